@@ -1,4 +1,4 @@
 from .config import settings  # noqa: F401
-from .security import hash_password, verify_password  # noqa: F401
+from .security import hash_password, verify_password, hash_password_async, verify_and_update_password_async, PasswordWorkersBusy  # noqa: F401
 from .jwt import _encode, create_token,refresh_token,decode_token #noqa 
 
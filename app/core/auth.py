@@ -1,17 +1,50 @@
 from fastapi.security import OAuth2PasswordBearer
-from fastapi import Depends, HTTPException, status
-from app.core import decode_token
+from fastapi import Depends, HTTPException, status, Header
+from app.core import decode_token, settings
+from app.core.cache import TTLCache
 from typing import Dict
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import event
+from app.database import AsyncSessionLocal
 # from app.database.db import get_db
-from app.helper import get_user_by_id
+from app.helper import get_user_by_id_async
+from app.models import User
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# user id -> get_user_by_id_async() result, so authenticated requests skip the users lookup.
+# Entries can be up to USER_CACHE_TTL stale, see config.py
+user_cache = TTLCache(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl)
 
-def get_token_payload(token: str = Depends(oauth2_scheme)):
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    # ORM flushes in this process only; not bulk updates, raw SQL or other workers
+    user_cache.pop(target.id)
+
+
+async def _load_user(user_id: int):
+    user = user_cache.get(user_id)
+    if user is None:
+        async with AsyncSessionLocal() as db:
+            user = await get_user_by_id_async(db, user_id)
+        if user is not None:
+            user_cache.set(user_id, user)
+    return dict(user) if user is not None else None
+
+
+def verify_internal_token(internal_token: str = Header(None)):
+    """Shared-secret check for machine callers (collectors, agents) sending an `internal-token` header."""
+    if internal_token != settings.internal_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Unauthorized access",
+        )
+
+
+async def get_token_payload(token: str = Depends(oauth2_scheme)):
     try:
         payload = decode_token(token=token)
         return payload
@@ -20,14 +53,16 @@ def get_token_payload(token: str = Depends(oauth2_scheme)):
     
 
 
-def get_current_user(payload:Dict = Depends(get_token_payload), db:Session = Depends(get_db)):
+async def get_current_user(payload:Dict = Depends(get_token_payload)):
     if payload.get("type") != "access":
         raise HTTPException(status_code=401, detail="Use an access token !!")
     sub = payload.get("sub")
     if not sub:
         raise HTTPException(status_code=401, detail="Subject not found !!")
-    user = get_user_by_id(db, int(sub))
-    if hasattr(user,"is_active") and not user.is_active:
+    user = await _load_user(int(sub))
+    if user is None:
+        raise HTTPException(status_code=401, detail="User not found !!")
+    if not user.get("is_active"):
         raise HTTPException(status_code=403, detail="User was deleted !!")
     return user
 
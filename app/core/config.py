@@ -14,6 +14,80 @@ class Settings(BaseSettings):
     fernet_key : str = Field(..., env="FERNET_KEY")
     internal_token : str = Field(..., env="INTERNAL_TOKEN")
     base_url : str = Field(..., env="BASE_URL")
+    # full SQLAlchemy URLs overriding the DB_* settings, e.g. sqlite:///./dev.db + sqlite+aiosqlite:///./dev.db
+    database_url : Optional[str] = Field(None, env="DATABASE_URL")
+    async_database_url : Optional[str] = Field(None, env="ASYNC_DATABASE_URL")
+    # create missing tables and run the additive migrations on startup; turn off when
+    # `python -m app.database.migrate` runs once per rollout instead of in every worker
+    db_auto_migrate : bool = Field(True, env="DB_AUTO_MIGRATE")
+
+    # connection pools of both engines (app/database/db.py)
+    db_pool_size : int = Field(10, env="DB_POOL_SIZE")
+    db_max_overflow : int = Field(20, env="DB_MAX_OVERFLOW")
+    db_pool_timeout : float = Field(30, env="DB_POOL_TIMEOUT")  # seconds to wait for a free connection
+    db_pool_recycle : int = Field(1800, env="DB_POOL_RECYCLE")  # below MySQL's wait_timeout; -1 disables
+    db_pool_pre_ping : bool = Field(True, env="DB_POOL_PRE_PING")
+
+    # SQL instrumentation (app/database/instrument.py)
+    slow_query_ms : float = Field(500, env="SLOW_QUERY_MS")  # 0 disables the slow-query log
+    slow_query_log_file : Optional[str] = Field(None, env="SLOW_QUERY_LOG_FILE")  # default: the uvicorn error log
+    query_count_warn : int = Field(50, env="QUERY_COUNT_WARN")  # log requests running more queries; 0 disables
+
+    # resolved users cached by get_current_user (app/core/auth.py); 0 disables. Only ORM
+    # writes to a user in the same worker evict it: other workers, bulk query().update()
+    # and raw SQL leave a deactivated user or an old role in effect for up to the TTL
+    user_cache_size : int = Field(1024, env="USER_CACHE_SIZE")
+    user_cache_ttl : float = Field(30, env="USER_CACHE_TTL")
+    # verified JWT claims cached by decode_token (app/core/jwt.py) until the token expires; 0 disables
+    token_cache_size : int = Field(4096, env="TOKEN_CACHE_SIZE")
+
+    # password hashing (app/core/security.py); stored hashes with another cost are upgraded at login
+    bcrypt_rounds : int = Field(12, env="BCRYPT_ROUNDS")
+    password_workers : int = Field(0, env="PASSWORD_WORKERS")  # processes, 0 = one per CPU
+    password_max_pending : int = Field(32, env="PASSWORD_MAX_PENDING")  # beyond this /auth/login answers 503
+
+    # reachability sweeper (app/utils/pinger.py)
+    ping_interval : float = Field(5.0, env="PING_INTERVAL")
+    ping_timeout : float = Field(1.0, env="PING_TIMEOUT")
+    ping_concurrency : int = Field(512, env="PING_CONCURRENCY")
+    ping_sweep_deadline : float = Field(4.0, env="PING_SWEEP_DEADLINE")
+    ping_engine : str = Field("auto", env="PING_ENGINE")  # auto (ICMP socket, ping fallback) | subprocess
+    probe_method : str = Field("icmp", env="PROBE_METHOD")  # icmp | tcp | auto (icmp, then tcp); vm_master.probe_method overrides
+    probe_tcp_ports : str = Field("22,3389,5985", env="PROBE_TCP_PORTS")
+    probe_tcp_timeout : float = Field(1.0, env="PROBE_TCP_TIMEOUT")
+
+    # pooled SSH transports (app/utils/ssh_pool.py)
+    ssh_port : int = Field(22, env="SSH_PORT")
+    ssh_connect_timeout : float = Field(5, env="SSH_CONNECT_TIMEOUT")
+    ssh_max_channels_per_host : int = Field(4, env="SSH_MAX_CHANNELS_PER_HOST")
+    ssh_idle_timeout : float = Field(3900, env="SSH_IDLE_TIMEOUT")  # outlives COLLECT_INTERVAL
+    ssh_keepalive : int = Field(30, env="SSH_KEEPALIVE")
+    ssh_command_timeout : float = Field(30, env="SSH_COMMAND_TIMEOUT")
+
+    # metrics collector (app/utils/collector.py)
+    collector_concurrency : int = Field(64, env="COLLECTOR_CONCURRENCY")
+    collect_interval : float = Field(3600, env="COLLECT_INTERVAL")  # seconds between scheduled runs, 0 disables
+
+    # vm_status bulk writes
+    status_bulk_chunk_size : int = Field(500, env="STATUS_BULK_CHUNK_SIZE")
+    status_bulk_max_items : int = Field(10000, env="STATUS_BULK_MAX_ITEMS")
+
+    # GET /status/ keyset pagination
+    status_page_size : int = Field(1000, env="STATUS_PAGE_SIZE")
+    status_max_page_size : int = Field(10000, env="STATUS_MAX_PAGE_SIZE")
+
+    # GET /status/export: rows fetched per round trip from the server-side cursor
+    status_export_batch_size : int = Field(2000, env="STATUS_EXPORT_BATCH_SIZE")
+
+    # NDJSON push ingestion (app/routers/ingest.py)
+    ingest_batch_size : int = Field(500, env="INGEST_BATCH_SIZE")
+    ingest_flush_interval : float = Field(2.0, env="INGEST_FLUSH_INTERVAL")
+    ingest_max_line_bytes : int = Field(65536, env="INGEST_MAX_LINE_BYTES")
+    ingest_max_sample_age : float = Field(7 * 24 * 3600, env="INGEST_MAX_SAMPLE_AGE")  # oldest created_at accepted, seconds
+
+    # vm_status_hourly / vm_status_daily compaction (app/utils/rollup.py); 0 disables the job
+    rollup_interval : float = Field(300, env="ROLLUP_INTERVAL")
+    rollup_window_hours : int = Field(24, env="ROLLUP_WINDOW_HOURS")
 
     class Config:
         env_file = ".env"
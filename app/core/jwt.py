@@ -1,8 +1,14 @@
 from app.core import settings
+from app.core.cache import TTLCache
+import hashlib
+import time
 from typing import Dict, Optional
 from datetime import datetime, timedelta, timezone
 from jose import jwt, ExpiredSignatureError, JWTError 
 
+# sha256(token) -> verified claims, each entry living until the token's exp
+token_cache = TTLCache(maxsize=settings.token_cache_size, ttl=0)
+
 
 def _encode(payload: Dict , expiry_time_delta : Optional[timedelta] = None):
     to_encode = payload.copy()
@@ -26,8 +32,15 @@ def refresh_token(subject:str):
    return _encode(payload)
 
 def decode_token(token:str):
+   key = hashlib.sha256(token.encode()).digest()
+   claims = token_cache.get(key)
+   if claims is not None and claims["exp"] > time.time():
+      return dict(claims)
    try:
-    return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    claims = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    if isinstance(claims.get("exp"), (int, float)):
+       token_cache.set(key, claims, ttl=claims["exp"] - time.time())
+    return dict(claims)
    except ExpiredSignatureError as e:
       raise ValueError("Token expired") from e
    except JWTError as e:
@@ -0,0 +1,176 @@
+"""
+Request metrics in the Prometheus text exposition format, without a client
+library: a pure ASGI middleware records into plain dicts (the event loop is
+the only writer, so no locks) and GET /metrics renders them.
+
+Requests are labeled by route template (`/status/{status_id}`), never by the
+raw path, so label cardinality is bounded by the number of routes. Requests no
+API route matched (404s, static files) share the `<unmatched>` label.
+"""
+import logging
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from app.core.config import settings
+from app.database.instrument import RequestQueries, current_request_queries
+
+logger = logging.getLogger("uvicorn.error")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.in_flight = 0
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str, int], _Histogram] = {}
+        self.size: Dict[Tuple[str, str, int], _Histogram] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float, size: int):
+        key = (method, route, status)
+        if key not in self.requests:
+            self.requests[key] = 0
+            self.latency[key] = _Histogram(LATENCY_BUCKETS)
+            self.size[key] = _Histogram(SIZE_BUCKETS)
+        self.requests[key] += 1
+        self.latency[key].observe(seconds)
+        self.size[key].observe(size)
+
+    def render(self) -> str:
+        lines: List[str] = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_requests_total Requests served, by route template and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for key, count in sorted(self.requests.items()):
+            lines.append(f"http_requests_total{{{_labels(key)}}} {count}")
+        _render_histogram(lines, "http_request_duration_seconds", "Request latency in seconds.", self.latency)
+        _render_histogram(lines, "http_response_size_bytes", "Response body size in bytes.", self.size)
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(key: Tuple[str, str, int]) -> str:
+    method, route, status = key
+    return f'method="{method}",route="{_escape(route)}",status="{status}"'
+
+
+def _render_histogram(lines: List[str], name: str, help_text: str, histograms: Dict[Tuple[str, str, int], _Histogram]):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, histogram in sorted(histograms.items()):
+        labels = _labels(key)
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        cumulative += histogram.counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+
+
+request_metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    """Pure ASGI (no BaseHTTPMiddleware task/stream overhead); reads the matched route from the scope afterwards."""
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight -= 1
+            route = scope.get("route")
+            metrics.observe(
+                scope["method"],
+                getattr(route, "path", "<unmatched>"),
+                status,
+                time.perf_counter() - started,
+                size,
+            )
+
+
+class QueryCountMiddleware:
+    """
+    Counts the SQL statements each request runs (see app/database/instrument.py),
+    reports them in X-Query-Count / X-Query-Time-Ms response headers and logs
+    requests running more than QUERY_COUNT_WARN of them. Statements issued
+    after the headers went out (streamed bodies) are only in the log line.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries()
+        token = current_request_queries.set(queries)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-query-count", str(queries.count).encode()),
+                    (b"x-query-time-ms", f"{queries.seconds * 1000:.1f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request_queries.reset(token)
+            if 0 < settings.query_count_warn < queries.count:
+                route = scope.get("route")
+                logger.warning(
+                    "%s %s ran %d SQL queries (%.1f ms)",
+                    scope["method"],
+                    getattr(route, "path", scope["path"]),
+                    queries.count,
+                    queries.seconds * 1000,
+                )
@@ -1,9 +1,95 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+from .config import settings
+
+# min = max = default rounds: hashes made with any other cost report needs_update,
+# so login can rehash them when BCRYPT_ROUNDS changes
+pwd_context = CryptContext(
+    schemes=['bcrypt'],
+    deprecated='auto',
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds,
+)
 
 def hash_password(password:str)->str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password:str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(valid, new hash or None); a new hash is returned when the stored one uses an outdated cost."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordWorkersBusy(Exception):
+    """More password hashes are queued than PASSWORD_MAX_PENDING allows."""
+
+
+# bcrypt is deliberately slow; it runs in its own process pool so a burst of
+# logins cannot take over the threadpool every sync endpoint shares
+_executor: Optional[ProcessPoolExecutor] = None
+_pending = 0
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.password_workers or os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn"),  # never fork a process full of threads
+        )
+    return _executor
+
+
+async def _run_in_password_pool(fn, *args):
+    global _pending
+    if _pending >= settings.password_max_pending:
+        raise PasswordWorkersBusy()
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        executor = _get_executor()
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            # a worker died (OOM killer, ...); start a fresh pool once. Every call in
+            # flight sees the same broken pool: only the first replaces it, the rest
+            # must not shut down the replacement their neighbours already retry on.
+            if _executor is executor:
+                shutdown_password_pool()
+            return await loop.run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_password_pool(hash_password, password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await _run_in_password_pool(verify_and_update_password, plain_password, hashed_password)
+
+
+def password_pool_stats():
+    return {
+        "workers": settings.password_workers or os.cpu_count() or 1,
+        "started": _executor is not None,
+        "pending": _pending,
+        "max_pending": settings.password_max_pending,
+    }
+
+
+def shutdown_password_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
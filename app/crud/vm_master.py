@@ -1,4 +1,6 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.vm_master import VMMasterUpdate, VMMasterCreate
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
@@ -115,10 +117,23 @@ def delete_master_vm(db: Session, vm_id: int):
         )
 
 
+def get_master_vm_by_ip(db: Session, ip: str):
+    return db.query(VMMaster).filter(VMMaster.ip == ip, VMMaster.is_active == 1).first()
+
+def remember_os_type(db: Session, vm: VMMaster, os_type: str):
+    """Store the OS detected by check_vm so the next collection skips detection."""
+    if os_type in ("linux", "windows") and vm.os_type != os_type:
+        vm.os_type = os_type
+        db.commit()
+
 def get_master_vm_by_id(db: Session, vm_id: int):
     existing_vm = db.query(VMMaster).filter(VMMaster.id == vm_id, VMMaster.is_active == 1).first()
     if not existing_vm:
         return None
     return existing_vm
 
+async def get_all_master_vms_async(db: AsyncSession):
+    return (await db.scalars(select(VMMaster).where(VMMaster.is_active == 1))).all()
 
+async def get_master_vm_by_id_async(db: AsyncSession, vm_id: int):
+    return await db.scalar(select(VMMaster).where(VMMaster.id == vm_id, VMMaster.is_active == 1))
@@ -1,38 +1,208 @@
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
+import secrets
+from sqlalchemy import insert, select, func, or_, and_
+from sqlalchemy.orm import Session, selectinload, noload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.exc import IntegrityError, DBAPIError
 from fastapi import HTTPException
-from app.models.vm_status import VMStatus
+from pydantic import ValidationError
+from app.models.vm_status import VMStatus, VMDiskUsage, VMStatusLatest
+from app.models.vm_master import VMMaster
 from datetime import datetime, date, timedelta
 from datetime import time
-# from app.models.vm_master import VMMaster
 from app.schemas.vm_status import VMStatusCreate, VMStatusUpdate
+from app.core.config import settings
+from app.helper.common import parse_disk_utilization
+from app.crud.vm_status_rollup import mark_rollups_dirty
 
 # def get_all_vm_statuses(db: Session):
 #     return db.query(VMStatus).filter(VMStatus.is_active == 1).all()
 
-def get_all_vm_statuses(db: Session, date_filter: date | None = None):
-    target_day = date_filter or datetime.now().date()
-
-    start_dt = datetime.combine(target_day, time.min)  # 00:00:00
-    end_dt   = start_dt + timedelta(days=1)            # next midnight
+def _vm_statuses_select(
+    date_filter: date | None = None,
+    vm_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int | None = None,
+    after: tuple[datetime, int] | None = None,
+    with_master: bool = True,
+):
+    """
+    Active statuses in [start, end) ordered by (created_at, id), at most `limit`
+    of them, continuing after the `after` (created_at, id) keyset cursor. Without
+    start/end the range is the `date_filter` day (default today). `vm_master` is
+    loaded up front (one extra query for all rows) or, without `with_master`,
+    not at all.
+    """
+    if start is None and end is None:
+        target_day = date_filter or datetime.now().date()
+        start = datetime.combine(target_day, time.min)  # 00:00:00
+        end   = start + timedelta(days=1)               # next midnight
 
     query = (
+        select(VMStatus)
+          .options(selectinload(VMStatus.vm_master) if with_master else noload(VMStatus.vm_master))
+          .where(VMStatus.is_active == 1)
+    )
+    if vm_id is not None:
+        query = query.where(VMStatus.vm_id == vm_id)
+    if start is not None:
+        query = query.where(VMStatus.created_at >= start)
+    if end is not None:
+        query = query.where(VMStatus.created_at < end)
+    if after is not None:
+        after_created, after_id = after
+        query = query.where(or_(
+            VMStatus.created_at > after_created,
+            and_(VMStatus.created_at == after_created, VMStatus.id > after_id),
+        ))
+    query = query.order_by(VMStatus.created_at, VMStatus.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+async def get_all_vm_statuses_async(db: AsyncSession, *args, **kwargs):
+    return (await db.scalars(_vm_statuses_select(*args, **kwargs))).all()
+
+def _vm_status_by_id_select(status_id: int):
+    return (
+        select(VMStatus)
+          .options(selectinload(VMStatus.vm_master))
+          .where(VMStatus.id == status_id, VMStatus.is_active == 1)
+    )
+
+async def get_vm_status_by_id_async(db: AsyncSession, status_id: int):
+    return await db.scalar(_vm_status_by_id_select(status_id))
+
+def _disk_usage(disk_utilization) -> list[VMDiskUsage]:
+    return [
+        VMDiskUsage(mount=mount[:100], used_pct=used_pct)
+        for mount, used_pct in parse_disk_utilization(disk_utilization).items()
+    ]
+
+def _insert_batch(db: Session, rows: list[dict]) -> list[int | None]:
+    """
+    Insert `rows` with one multi-row INSERT and return their ids in row order.
+    MySQL does not hand back the ids of a multi-row INSERT, and matching on
+    (vm_id, created_at) is ambiguous when another writer stores the same VM in
+    the same second, so every row carries a random batch token that is looked
+    up instead. Rows of one INSERT get ascending ids, so id order is row order.
+    """
+    token = secrets.randbits(63)
+    db.execute(insert(VMStatus).values([{**row, "insert_batch": token} for row in rows]))
+    created = [row["created_at"] for row in rows]
+    ids = list(db.scalars(
+        select(VMStatus.id)
+          .where(VMStatus.vm_id.in_({row["vm_id"] for row in rows}))
+          .where(VMStatus.created_at >= min(created), VMStatus.created_at <= max(created))
+          .where(VMStatus.insert_batch == token)  # the range above keeps this on ix_vm_status_vm_created
+          .order_by(VMStatus.id)
+    ))
+    return ids if len(ids) == len(rows) else [None] * len(rows)
+
+def _insert_disk_usage(db: Session, rows: list[dict], status_ids: list[int | None]):
+    """vm_disk_usage rows for freshly inserted vm_status rows."""
+    parsed = [parse_disk_utilization(row.get("disk_utilization")) for row in rows]
+    disk_rows = [
+        {"status_id": status_id, "mount": mount[:100], "used_pct": used_pct}
+        for status_id, disks in zip(status_ids, parsed)
+        if status_id is not None
+        for mount, used_pct in disks.items()
+    ]
+    for start in range(0, len(disk_rows), settings.status_bulk_chunk_size):
+        db.execute(insert(VMDiskUsage).values(disk_rows[start:start + settings.status_bulk_chunk_size]))
+
+LATEST_COLUMNS = ("status_id", "ip", "status", "os", "cpu_utilization", "memory_utilization", "disk_utilization", "created_at")
+_UPSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+def _upsert_latest(db: Session, stored: list[tuple[dict, int | None]]):
+    """
+    Point vm_status_latest at the newest of the given (row, status id) pairs per VM,
+    unless it already holds a newer status. Runs in the caller's transaction.
+    """
+    newest = {}
+    for row, status_id in stored:
+        if status_id is None:
+            continue
+        current = newest.get(row["vm_id"])
+        if current is None or (row["created_at"], status_id) >= (current["created_at"], current["status_id"]):
+            newest[row["vm_id"]] = {
+                "vm_id": row["vm_id"],
+                "status_id": status_id,
+                **{name: row.get(name) for name in LATEST_COLUMNS if name != "status_id"},
+            }
+    if not newest:
+        return
+    table = VMStatusLatest.__table__
+    values = list(newest.values())
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(table).values(values)
+        newer = stmt.inserted.created_at >= table.c.created_at
+        # assignments run left to right, so created_at has to be compared before it is overwritten
+        db.execute(stmt.on_duplicate_key_update([
+            (name, func.if_(newer, stmt.inserted[name], table.c[name])) for name in LATEST_COLUMNS
+        ]))
+    elif dialect in _UPSERTS:
+        stmt = _UPSERTS[dialect](table).values(values)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.vm_id],
+            set_={name: stmt.excluded[name] for name in LATEST_COLUMNS},
+            where=stmt.excluded.created_at >= table.c.created_at,
+        ))
+    else:
+        for value in values:
+            current = db.get(VMStatusLatest, value["vm_id"])
+            if current is None or value["created_at"] >= current.created_at:
+                db.merge(VMStatusLatest(**value))
+
+def _refresh_latest(db: Session, vm_id: int):
+    """Re-derive a VM's vm_status_latest row after one of its statuses was edited or deleted."""
+    db.query(VMStatusLatest).filter(VMStatusLatest.vm_id == vm_id).delete(synchronize_session=False)
+    newest = (
         db.query(VMStatus)
-          .filter(VMStatus.is_active == 1)
-          .filter(VMStatus.created_at >= start_dt, VMStatus.created_at < end_dt)
+          .filter(VMStatus.vm_id == vm_id, VMStatus.is_active == 1)
+          .order_by(VMStatus.created_at.desc(), VMStatus.id.desc())
+          .first()
     )
-    return query.all()
+    if newest is not None:
+        db.add(VMStatusLatest(
+            vm_id=vm_id,
+            status_id=newest.id,
+            **{name: getattr(newest, name) for name in LATEST_COLUMNS if name != "status_id"},
+        ))
 
-def get_vm_status_by_id(db: Session, status_id: int):
-    vm_status = db.query(VMStatus).filter(VMStatus.id == status_id, VMStatus.is_active == 1).first()
-    if not vm_status:
-        return None
-    return vm_status
+def _latest_vm_statuses_select(project: str | None = None, cluster: str | None = None):
+    query = (
+        select(
+            VMStatusLatest.vm_id,
+            VMMaster.vm_name,
+            VMMaster.project_name,
+            VMMaster.cluster,
+            *(getattr(VMStatusLatest, name) for name in LATEST_COLUMNS),
+        )
+        .join(VMMaster, VMMaster.id == VMStatusLatest.vm_id)
+        .where(VMMaster.is_active == 1)
+    )
+    if project is not None:
+        query = query.where(VMMaster.project_name == project)
+    if cluster is not None:
+        query = query.where(VMMaster.cluster == cluster)
+    return query.order_by(VMMaster.vm_name)
+
+async def get_latest_vm_statuses_async(db: AsyncSession, project: str | None = None, cluster: str | None = None):
+    return (await db.execute(_latest_vm_statuses_select(project, cluster))).all()
 
 def create_vm_status(db: Session, vm_status_data: VMStatusCreate):
-    new_status = VMStatus(**vm_status_data.model_dump())
+    new_status = VMStatus(**vm_status_data.model_dump(), created_at=datetime.now().replace(microsecond=0))
+    new_status.disks = _disk_usage(new_status.disk_utilization)
     db.add(new_status)
     try:
+        db.flush()
+        _upsert_latest(db, [(vm_status_data.model_dump() | {"created_at": new_status.created_at}, new_status.id)])
+        mark_rollups_dirty(db, [new_status.created_at])
         db.commit()
         db.refresh(new_status)
         return new_status
@@ -40,6 +210,91 @@ def create_vm_status(db: Session, vm_status_data: VMStatusCreate):
         db.rollback()
         raise HTTPException(status_code=400, detail="Integrity error while creating VM status.")
 
+def insert_vm_statuses(db: Session, rows: list[dict], chunk_size: int | None = None):
+    """
+    Store many status rows in one transaction, one multi-row INSERT per chunk.
+    A chunk the database rejects is retried row by row, each in its own savepoint,
+    so a bad row only costs itself. Each row's disk_utilization is also stored
+    per mount in vm_disk_usage, and vm_status_latest is moved forward in the
+    same transaction. Returns (inserted, [(row index, error), ...]).
+    """
+    chunk_size = chunk_size or settings.status_bulk_chunk_size
+    # explicit and in whole seconds, as DATETIME stores it, so vm_status_latest compares like the table
+    now = datetime.now().replace(microsecond=0)
+    rows = [
+        {**row, "created_at": (row.get("created_at") or now).replace(microsecond=0)}
+        for row in rows
+    ]
+    inserted = 0
+    errors = []
+    stored = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        try:
+            with db.begin_nested():
+                status_ids = _insert_batch(db, chunk)
+                _insert_disk_usage(db, chunk, status_ids)
+            inserted += len(chunk)
+            stored.extend(zip(chunk, status_ids))
+            continue
+        except DBAPIError:
+            pass
+        for offset, row in enumerate(chunk):
+            try:
+                with db.begin_nested():
+                    status_id = db.execute(insert(VMStatus).values(row)).inserted_primary_key[0]
+                    _insert_disk_usage(db, [row], [status_id])
+                inserted += 1
+                stored.append((row, status_id))
+            except DBAPIError as e:
+                errors.append((start + offset, str(e.orig)))
+    _upsert_latest(db, stored)
+    mark_rollups_dirty(db, [row["created_at"] for row, _ in stored])
+    db.commit()
+    return inserted, errors
+
+def store_vm_statuses(db: Session, rows: list[dict]):
+    """
+    insert_vm_statuses for already validated rows, skipping rows whose VM does
+    not exist. Returns (inserted, [(row index, error), ...]).
+    """
+    vm_ids = {row["vm_id"] for row in rows}
+    known = {vm_id for (vm_id,) in db.query(VMMaster.id).filter(VMMaster.id.in_(vm_ids))} if vm_ids else set()
+    errors = []
+    valid_rows = []
+    valid_indexes = []
+    for index, row in enumerate(rows):
+        if row["vm_id"] in known:
+            valid_rows.append(row)
+            valid_indexes.append(index)
+        else:
+            errors.append((index, f"VM {row['vm_id']} not found"))
+
+    inserted, db_errors = insert_vm_statuses(db, valid_rows)
+    errors.extend((valid_indexes[i], error) for i, error in db_errors)
+    return inserted, errors
+
+def bulk_create_vm_statuses(db: Session, items: list[dict]):
+    """
+    Validate each item as VMStatusCreate and store the valid ones with
+    store_vm_statuses. Invalid items and unknown VMs are reported per index
+    instead of failing the whole batch.
+    """
+    rows = []
+    indexes = []
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            rows.append(VMStatusCreate.model_validate(item).model_dump())
+            indexes.append(index)
+        except ValidationError as e:
+            errors.append({"index": index, "error": e.errors(include_url=False, include_input=False)})
+
+    inserted, db_errors = store_vm_statuses(db, rows)
+    errors.extend({"index": indexes[i], "error": error} for i, error in db_errors)
+    errors.sort(key=lambda e: e["index"])
+    return {"received": len(items), "inserted": inserted, "failed": len(errors), "errors": errors}
+
 def update_vm_status(db: Session, status_id: int, vm_status_update: VMStatusUpdate):
     vm_status = db.query(VMStatus).filter(VMStatus.id == status_id, VMStatus.is_active == 1).first()
     if not vm_status:
@@ -47,6 +302,11 @@ def update_vm_status(db: Session, status_id: int, vm_status_update: VMStatusUpda
     update_data = vm_status_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(vm_status, field, value)
+    if "disk_utilization" in update_data:
+        vm_status.disks = _disk_usage(vm_status.disk_utilization)
+    db.flush()
+    _refresh_latest(db, vm_status.vm_id)
+    mark_rollups_dirty(db, [vm_status.created_at])
     db.commit()
     db.refresh(vm_status)
     return vm_status
@@ -57,9 +317,77 @@ def delete_vm_status(db: Session, status_id: int):
         raise HTTPException(status_code=404, detail="VM status not found or already deleted.")
     try:
         vm_status.is_active = 0
+        db.flush()
+        _refresh_latest(db, vm_status.vm_id)
+        mark_rollups_dirty(db, [vm_status.created_at])
         db.commit()
         db.refresh(vm_status)
         return vm_status
     except IntegrityError:
         db.rollback()
-        raise HTTPException(status_code=400, detail="Cannot delete VM status due to related dependencies.")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail="Cannot delete VM status due to related dependencies.")
+
+def get_disk_alerts(db: Session, threshold: float, date_filter: date | None = None):
+    """Every (VM, mount) that went above `threshold` percent used on the given day (default today)."""
+    start_dt = datetime.combine(date_filter or datetime.now().date(), time.min)
+    end_dt = start_dt + timedelta(days=1)
+    return (
+        db.query(
+            VMStatus.vm_id,
+            VMMaster.vm_name,
+            VMDiskUsage.mount,
+            func.max(VMDiskUsage.used_pct).label("max_used_pct"),
+            func.max(VMStatus.created_at).label("last_seen"),
+        )
+        .join(VMDiskUsage, VMDiskUsage.status_id == VMStatus.id)
+        .join(VMMaster, VMMaster.id == VMStatus.vm_id)
+        .filter(VMStatus.is_active == 1)
+        .filter(VMStatus.created_at >= start_dt, VMStatus.created_at < end_dt)
+        .filter(VMDiskUsage.used_pct > threshold)
+        .group_by(VMStatus.vm_id, VMMaster.vm_name, VMDiskUsage.mount)
+        .order_by(func.max(VMDiskUsage.used_pct).desc())
+        .all()
+    )
+
+EXPORT_COLUMNS = (
+    VMStatus.id,
+    VMStatus.vm_id,
+    VMMaster.vm_name,
+    VMMaster.project_name,
+    VMStatus.ip,
+    VMStatus.status,
+    VMStatus.os,
+    VMStatus.cpu_utilization,
+    VMStatus.memory_utilization,
+    VMStatus.disk_utilization,
+    VMStatus.created_at,
+)
+
+def iter_vm_statuses(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    vm_id: int | None = None,
+    batch_size: int | None = None,
+):
+    """
+    Yield lists of plain rows (not ORM objects) for active statuses in
+    [start, end), oldest first. The query runs on a server-side cursor
+    (unbuffered SSCursor on PyMySQL), so only one batch is in memory at a time.
+    """
+    query = (
+        select(*EXPORT_COLUMNS)
+        .join(VMMaster, VMMaster.id == VMStatus.vm_id)
+        .where(VMStatus.is_active == 1)
+        .where(VMStatus.created_at >= start, VMStatus.created_at < end)
+        .order_by(VMStatus.created_at, VMStatus.id)
+    )
+    if vm_id is not None:
+        query = query.where(VMStatus.vm_id == vm_id)
+    batch_size = batch_size or settings.status_export_batch_size
+    result = db.execute(query.execution_options(stream_results=True, yield_per=batch_size))
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
@@ -0,0 +1,254 @@
+from datetime import date, datetime, timedelta
+from typing import Iterable
+from sqlalchemy import case, func, insert, literal_column
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from app.models.vm_status import VMStatus, VMDiskUsage
+from app.models.vm_status_rollup import VMStatusHourly, VMStatusDaily, VMStatusRollupDirty
+from app.core.config import settings
+
+UP_STATUSES = {"reachable", "up"}
+ROLLUP_MODELS = {"hourly": VMStatusHourly, "daily": VMStatusDaily}
+_INSERT_CHUNK = 1000
+
+
+def _floor_hour(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def _floor_day(dt: datetime) -> datetime:
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _ceil_day(dt: datetime) -> datetime:
+    day = _floor_day(dt)
+    return day if day == dt else day + timedelta(days=1)
+
+
+def mark_rollups_dirty(db: Session, created_ats: Iterable[datetime]):
+    """
+    Record the hours of samples that were stored, edited or deleted, so the next
+    compaction rebuilds them even when newer buckets already exist (late agent
+    samples, PUT / DELETE of old rows). Runs in the caller's transaction.
+    """
+    buckets = sorted({_floor_hour(created_at) for created_at in created_ats if created_at is not None})
+    if not buckets:
+        return
+    table = VMStatusRollupDirty.__table__
+    values = [{"bucket": bucket} for bucket in buckets]
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        db.execute(insert(table).prefix_with("IGNORE").values(values))
+    elif dialect == "sqlite":
+        db.execute(sqlite_insert(table).values(values).on_conflict_do_nothing())
+    elif dialect == "postgresql":
+        db.execute(postgresql_insert(table).values(values).on_conflict_do_nothing())
+    else:
+        for bucket in buckets:
+            if db.get(VMStatusRollupDirty, bucket) is None:
+                db.add(VMStatusRollupDirty(bucket=bucket))
+
+
+def _claim_dirty(db: Session) -> list[datetime]:
+    """
+    Take the dirty hours off the table before rebuilding them. A writer that marks
+    an hour again afterwards is picked up by the next run; on MySQL, deleting waits
+    for writers still holding the row, so their samples are visible to the rebuild.
+    """
+    buckets = [bucket for (bucket,) in db.query(VMStatusRollupDirty.bucket).order_by(VMStatusRollupDirty.bucket)]
+    if buckets:
+        db.query(VMStatusRollupDirty).filter(VMStatusRollupDirty.bucket.in_(buckets)).delete(synchronize_session=False)
+        db.commit()
+    return buckets
+
+
+def _merge(ranges: list[tuple[datetime, datetime]]) -> list[tuple[datetime, datetime]]:
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _rebuild_windows(db: Session, rebuild, start: datetime, end: datetime, window: timedelta) -> int:
+    rows = 0
+    while start < end:
+        window_end = min(start + window, end)
+        rows += rebuild(db, start, window_end)
+        start = window_end
+    return rows
+
+
+def _truncate(db: Session, column, unit: str):
+    """`column` truncated to the start of its hour / day, in this database's dialect."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return func.date_trunc(unit, column)
+    if unit == "day":
+        return func.date(column)
+    if dialect == "sqlite":
+        return func.strftime("%Y-%m-%d %H:00:00", column)
+    return func.date_format(column, "%Y-%m-%d %H:00:00")
+
+
+def _as_datetime(value) -> datetime:
+    # drivers return the truncated bucket as a datetime, a date or a string
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    return datetime.fromisoformat(value)
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def _bucket_row(vm_id, bucket, samples, up_samples, cpu_min, cpu_max, cpu_avg, memory_min, memory_max, memory_avg, disk_max):
+    return {
+        "vm_id": vm_id,
+        "bucket": _as_datetime(bucket),
+        "samples": int(samples),  # MySQL sums come back as Decimal
+        "up_samples": int(up_samples),
+        "up_ratio": round(int(up_samples) / int(samples), 4) if samples else 0.0,
+        "cpu_min": cpu_min,
+        "cpu_avg": _round(cpu_avg),
+        "cpu_max": cpu_max,
+        "memory_min": memory_min,
+        "memory_avg": _round(memory_avg),
+        "memory_max": memory_max,
+        "disk_max": disk_max,
+    }
+
+
+def _replace_buckets(db: Session, model, start: datetime, end: datetime, rows: list[dict]):
+    db.query(model).filter(model.bucket >= start, model.bucket < end).delete(synchronize_session=False)
+    for i in range(0, len(rows), _INSERT_CHUNK):
+        db.execute(insert(model).values(rows[i:i + _INSERT_CHUNK]))
+    db.commit()
+    return len(rows)
+
+
+# grouped by the select's alias: MySQL's ONLY_FULL_GROUP_BY does not see two
+# DATE_FORMAT(created_at, %s) with separately bound formats as the same expression.
+# Not "bucket", which GROUP BY would resolve to the rollup tables' own column.
+_BUCKET_START = literal_column("bucket_start")
+
+
+def _rebuild_hourly(db: Session, start: datetime, end: datetime) -> int:
+    hour = _truncate(db, VMStatus.created_at, "hour").label("bucket_start")
+    in_window = (VMStatus.is_active == 1, VMStatus.created_at >= start, VMStatus.created_at < end)
+    # disks in a query of their own: joining them in would count every sample once per mount
+    disk_max = {
+        (vm_id, _as_datetime(bucket)): used_pct
+        for vm_id, bucket, used_pct in (
+            db.query(VMStatus.vm_id, hour, func.max(VMDiskUsage.used_pct))
+              .join(VMDiskUsage, VMDiskUsage.status_id == VMStatus.id)
+              .filter(*in_window)
+              .group_by(VMStatus.vm_id, _BUCKET_START)
+        )
+    }
+    up = case((func.lower(VMStatus.status).in_(UP_STATUSES), 1), else_=0)
+    samples = (
+        db.query(
+            VMStatus.vm_id,
+            hour,
+            func.count(),
+            func.sum(up),
+            func.min(VMStatus.cpu_utilization),
+            func.max(VMStatus.cpu_utilization),
+            func.avg(VMStatus.cpu_utilization),
+            func.min(VMStatus.memory_utilization),
+            func.max(VMStatus.memory_utilization),
+            func.avg(VMStatus.memory_utilization),
+        )
+        .filter(*in_window)
+        .group_by(VMStatus.vm_id, _BUCKET_START)
+    )
+    rows = [
+        _bucket_row(vm_id, bucket, *stats, disk_max.get((vm_id, _as_datetime(bucket))))
+        for vm_id, bucket, *stats in samples
+    ]
+    return _replace_buckets(db, VMStatusHourly, start, end, rows)
+
+
+def _weighted_avg(column):
+    # an hourly average stands for all samples of its hour
+    weight = case((column.isnot(None), VMStatusHourly.samples), else_=0)
+    return func.sum(column * VMStatusHourly.samples) / func.nullif(func.sum(weight), 0)
+
+
+def _rebuild_daily(db: Session, start: datetime, end: datetime) -> int:
+    day = _truncate(db, VMStatusHourly.bucket, "day").label("bucket_start")
+    hours = (
+        db.query(
+            VMStatusHourly.vm_id,
+            day,
+            func.sum(VMStatusHourly.samples),
+            func.sum(VMStatusHourly.up_samples),
+            func.min(VMStatusHourly.cpu_min),
+            func.max(VMStatusHourly.cpu_max),
+            _weighted_avg(VMStatusHourly.cpu_avg),
+            func.min(VMStatusHourly.memory_min),
+            func.max(VMStatusHourly.memory_max),
+            _weighted_avg(VMStatusHourly.memory_avg),
+            func.max(VMStatusHourly.disk_max),
+        )
+        .filter(VMStatusHourly.bucket >= start, VMStatusHourly.bucket < end)
+        .group_by(VMStatusHourly.vm_id, _BUCKET_START)
+    )
+    rows = [_bucket_row(vm_id, bucket, *stats) for vm_id, bucket, *stats in hours]
+    return _replace_buckets(db, VMStatusDaily, start, end, rows)
+
+
+def compact_rollups(db: Session, now: datetime | None = None):
+    """
+    Bring vm_status_hourly and vm_status_daily up to date. Work resumes from the
+    newest hourly bucket (which may have been partial), so a regular run only
+    re-aggregates the current hour and day, plus the older hours marked dirty by
+    mark_rollups_dirty and their days. The first run backfills all history in
+    windows of `rollup_window_hours`.
+    """
+    now = now or datetime.now()
+    end = _floor_hour(now) + timedelta(hours=1)
+    dirty = _claim_dirty(db)
+    try:
+        start = db.query(func.max(VMStatusHourly.bucket)).scalar()
+        if start is None:
+            first = db.query(func.min(VMStatus.created_at)).filter(VMStatus.is_active == 1).scalar()
+            start = _floor_hour(first) if first is not None else end
+        hours = _merge([(start, end)] + [(bucket, bucket + timedelta(hours=1)) for bucket in dirty if bucket < start])
+        days = _merge([(_floor_day(first), _ceil_day(last)) for first, last in hours])
+
+        window = timedelta(hours=settings.rollup_window_hours)
+        hourly_rows = sum(_rebuild_windows(db, _rebuild_hourly, first, last, window) for first, last in hours)
+        window = timedelta(days=max(1, settings.rollup_window_hours // 24))
+        daily_rows = sum(_rebuild_windows(db, _rebuild_daily, first, last, window) for first, last in days)
+    except Exception:
+        db.rollback()
+        mark_rollups_dirty(db, dirty)  # try again next run
+        db.commit()
+        raise
+    return {"from": start, "dirty_hours": len(dirty), "hourly_rows": hourly_rows, "daily_rows": daily_rows}
+
+
+def get_rollups(
+    db: Session,
+    granularity: str,
+    vm_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int = 10000,
+):
+    model = ROLLUP_MODELS[granularity]
+    query = db.query(model)
+    if vm_id is not None:
+        query = query.filter(model.vm_id == vm_id)
+    if start is not None:
+        query = query.filter(model.bucket >= start)
+    if end is not None:
+        query = query.filter(model.bucket < end)
+    return query.order_by(model.bucket, model.vm_id).limit(limit).all()
@@ -1,3 +1,3 @@
-from .db import get_db, engine,SessionLocal #noqa
+from .db import get_db, engine,SessionLocal, get_async_db, async_engine, AsyncSessionLocal #noqa
 
 from .Base import Base #noqa
\ No newline at end of file
@@ -1,13 +1,39 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core import settings
+from .pool import InstrumentedQueuePool, InstrumentedAsyncQueuePool
+from .instrument import instrument_engine
 
-DATABASE_URL = f"mysql+pymysql://{settings.db_user}:{settings.db_password}@{settings.db_host}/{settings.db_name}"
+DATABASE_URL = settings.database_url or f"mysql+pymysql://{settings.db_user}:{settings.db_password}@{settings.db_host}/{settings.db_name}"
+ASYNC_DATABASE_URL = settings.async_database_url or f"mysql+aiomysql://{settings.db_user}:{settings.db_password}@{settings.db_host}/{settings.db_name}"
 
-engine = create_engine(DATABASE_URL)
+
+def _pool_options(url: str, poolclass) -> dict:
+    if make_url(url).database in (None, "", ":memory:"):
+        return {}  # in-memory sqlite keeps its single-connection pool
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+engine = create_engine(DATABASE_URL, **_pool_options(DATABASE_URL, InstrumentedQueuePool))
 
 SessionLocal = sessionmaker(autoflush=False, bind=engine)
 
+# read-heavy endpoints use this one, so waiting on MySQL does not hold a threadpool thread
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_pool_options(ASYNC_DATABASE_URL, InstrumentedAsyncQueuePool))
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -15,5 +41,6 @@ def get_db():
     finally:
         db.close()
 
-
- 
\ No newline at end of file
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,129 @@
+import logging
+import re
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+# a child of the uvicorn error log unless SLOW_QUERY_LOG_FILE gives it a file of its own
+slow_query_logger = logging.getLogger("uvicorn.error.slow_queries")
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'|\b\d+(?:\.\d+)?\b")
+_VALUE_GROUPS = re.compile(r"\(\?(?:, \?)*\)(?:, \(\?(?:, \?)*\))+")
+_IN_LIST = re.compile(r"\bIN \(\?(?:, \?)*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement: str) -> str:
+    """One shape per query: literals and placeholders become ?, IN lists and multi-row VALUES collapse."""
+    sql = _SPACE.sub(" ", statement).strip()
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _LITERAL.sub("?", sql)
+    sql = _IN_LIST.sub("IN (?...)", sql)
+    return _VALUE_GROUPS.sub("(?...), ...", sql)
+
+
+class RequestQueries:
+    """Queries run on behalf of one request (set by QueryCountMiddleware)."""
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# carried into threadpool workers and greenlets, so sync and async routes are both counted
+current_request_queries: ContextVar[Optional[RequestQueries]] = ContextVar("current_request_queries", default=None)
+
+
+class QueryStats:
+    """Per normalized statement count/total/max time, bounded to `max_statements` shapes."""
+
+    def __init__(self, max_statements: int = 500):
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self._by_statement: Dict[str, List[float]] = {}
+        self.queries = 0
+        self.slow_queries = 0
+
+    def record(self, statement: str, seconds: float, slow: bool):
+        sql = normalize_sql(statement)
+        with self._lock:
+            self.queries += 1
+            self.slow_queries += slow
+            entry = self._by_statement.get(sql)
+            if entry is None:
+                if len(self._by_statement) >= self.max_statements:
+                    return
+                entry = self._by_statement[sql] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def snapshot(self, top: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            items = sorted(self._by_statement.items(), key=lambda item: item[1][1], reverse=True)[:top]
+            return {
+                "queries": self.queries,
+                "slow_queries": self.slow_queries,
+                "slow_threshold_ms": settings.slow_query_ms,
+                "top_by_total_time": [
+                    {
+                        "sql": sql,
+                        "count": count,
+                        "total_ms": round(total * 1000, 3),
+                        "avg_ms": round(total * 1000 / count, 3),
+                        "max_ms": round(longest * 1000, 3),
+                    }
+                    for sql, (count, total, longest) in items
+                ],
+            }
+
+
+query_stats = QueryStats()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_started"].pop()
+    slow = seconds * 1000 >= settings.slow_query_ms > 0
+    query_stats.record(statement, seconds, slow)
+    request = current_request_queries.get()
+    if request is not None:
+        request.count += 1
+        request.seconds += seconds
+    if slow:
+        slow_query_logger.warning("%.1f ms %s", seconds * 1000, normalize_sql(statement))
+
+
+def _handle_error(context):
+    # a failed statement never reaches after_cursor_execute
+    if context.connection is not None and context.connection.info.get("query_started"):
+        context.connection.info["query_started"].pop()
+
+
+def instrument_engine(engine: Engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+if settings.slow_query_log_file:
+    _handler = RotatingFileHandler(
+        settings.slow_query_log_file, maxBytes=10 * 1024 * 1024, backupCount=5, delay=True
+    )
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_query_logger.addHandler(_handler)
+    slow_query_logger.propagate = False
@@ -0,0 +1,87 @@
+import logging
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def _lock_name(engine: Engine, name: str) -> str:
+    # named locks are server-wide, so two schemas on one server must not share one
+    return f"{engine.url.database}.{name}"
+
+
+@contextmanager
+def named_lock(engine: Engine, name: str, timeout: int = -1) -> Iterator[None]:
+    """
+    Run the block while holding a MySQL named lock, waiting up to `timeout`
+    seconds (-1: as long as it takes) for another process to release it. For
+    one-off work every worker would otherwise start at once, like migrations.
+    Other backends have no named locks and run the block unguarded.
+    """
+    if engine.dialect.name != "mysql":
+        yield
+        return
+    name = _lock_name(engine, name)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if conn.scalar(text("SELECT GET_LOCK(:name, :timeout)"), {"name": name, "timeout": timeout}) != 1:
+            raise TimeoutError(f"Could not get the {name} lock within {timeout}s")
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+
+
+class LeaderLock:
+    """
+    Elects one process among all workers sharing the database to run a periodic
+    job, with a MySQL named lock (GET_LOCK) held on a dedicated connection. The
+    leader keeps the lock until it releases it or its connection dies, after
+    which the next `held()` call in another worker takes over. Other backends
+    have no named locks; there every process counts as the leader, which is what
+    a single-worker development setup needs.
+    """
+
+    def __init__(self, engine: Engine, name: str):
+        self.engine = engine
+        self.name = _lock_name(engine, name)
+        self._conn: Optional[Connection] = None
+
+    def held(self) -> bool:
+        """Whether this process is the leader, trying to become it if not. Blocking."""
+        if self.engine.dialect.name != "mysql":
+            return True
+        try:
+            if self._conn is not None:
+                if self._conn.scalar(text("SELECT IS_USED_LOCK(:name) = CONNECTION_ID()"), {"name": self.name}):
+                    return True
+                self._close()
+            self._conn = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+            if self._conn.scalar(text("SELECT GET_LOCK(:name, 0)"), {"name": self.name}) == 1:
+                logger.info("This worker now runs %s", self.name)
+                return True
+            self._close()
+        except DBAPIError:
+            logger.warning("Lost the %s lock connection", self.name, exc_info=True)
+            self._close()
+        return False
+
+    def release(self):
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": self.name})
+        except DBAPIError:
+            pass  # closing the connection releases it as well
+        self._close()
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except DBAPIError:
+                pass
+            self._conn = None
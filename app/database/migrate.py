@@ -0,0 +1,180 @@
+import logging
+from sqlalchemy import inspect, text, String, UniqueConstraint
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn
+
+from .Base import Base
+from .lock import named_lock
+from app.helper.common import parse_disk_utilization
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def add_missing_columns(engine: Engine):
+    """
+    `create_all` only creates missing tables. Columns added to an existing model
+    are created here with a plain `ALTER TABLE ... ADD COLUMN`; they must be
+    nullable or carry a server default.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                logger.info("Adding column %s.%s", table.name, column.name)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+
+def add_missing_indexes(engine: Engine):
+    """
+    Create indexes and unique constraints declared on models of tables that
+    already existed before they were added. Rows a new unique constraint would
+    reject are dropped first, keeping the oldest (lowest id) of each group.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {index["name"] for index in inspector.get_indexes(table.name)}
+            present |= {constraint["name"] for constraint in inspector.get_unique_constraints(table.name)}
+            for index in table.indexes:
+                if index.name not in present:
+                    logger.info("Creating index %s on %s", index.name, table.name)
+                    index.create(bind=conn)
+            for constraint in table.constraints:
+                if not isinstance(constraint, UniqueConstraint) or constraint.name in present:
+                    continue
+                columns = ", ".join(column.name for column in constraint.columns)
+                if "id" in table.c:
+                    # through a derived table: MySQL cannot select from the table it deletes from
+                    result = conn.execute(text(
+                        f"DELETE FROM {table.name} WHERE id NOT IN"
+                        f" (SELECT id FROM (SELECT MIN(id) AS id FROM {table.name} GROUP BY {columns}) keep)"
+                    ))
+                    if result.rowcount:
+                        logger.warning("Dropped %d duplicate %s rows", result.rowcount, table.name)
+                logger.info("Creating unique index %s on %s", constraint.name, table.name)
+                # CREATE UNIQUE INDEX rather than ADD CONSTRAINT, which SQLite lacks
+                conn.execute(text(f"CREATE UNIQUE INDEX {constraint.name} ON {table.name} ({columns})"))
+
+
+def backfill_latest_status(engine: Engine):
+    """Fill an empty vm_status_latest from vm_status history (first start after it was added)."""
+    inspector = inspect(engine)
+    if not {"vm_status", "vm_status_latest"} <= set(inspector.get_table_names()):
+        return
+    # prepare_database's lock keeps MySQL workers apart; elsewhere two of them may
+    # both find the table empty, so the loser skips the rows instead of failing
+    insert, conflict = {
+        "mysql": ("INSERT IGNORE", ""),
+        "sqlite": ("INSERT OR IGNORE", ""),
+        "postgresql": ("INSERT", " ON CONFLICT DO NOTHING"),
+    }.get(engine.dialect.name, ("INSERT", ""))
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT 1 FROM vm_status_latest LIMIT 1")).first() is not None:
+            return
+        result = conn.execute(text(
+            f"{insert} INTO vm_status_latest"
+            " (vm_id, status_id, ip, status, os, cpu_utilization, memory_utilization, disk_utilization, created_at)"
+            " SELECT s.vm_id, s.id, s.ip, s.status, s.os, s.cpu_utilization, s.memory_utilization,"
+            " s.disk_utilization, s.created_at FROM vm_status s WHERE s.id IN ("
+            "  SELECT MAX(s2.id) FROM vm_status s2 JOIN ("
+            "   SELECT vm_id, MAX(created_at) AS created_at FROM vm_status WHERE is_active = 1 GROUP BY vm_id"
+            "  ) newest ON newest.vm_id = s2.vm_id AND newest.created_at = s2.created_at"
+            "  WHERE s2.is_active = 1 GROUP BY s2.vm_id"
+            f" ){conflict}"
+        ))
+        logger.info("Backfilled vm_status_latest with %d rows", result.rowcount)
+
+
+def migrate_typed_metrics(engine: Engine, batch_size: int = 5000):
+    """
+    vm_status.cpu_utilization used to be a VARCHAR holding values like "12.5%",
+    and disk usage only lived in the disk_utilization string. While the column is
+    still a string: fill vm_disk_usage from disk_utilization in id batches, clean
+    the CPU values (strip "%", anything unparseable becomes NULL), then convert
+    the column to FLOAT. The conversion runs last, so an interrupted migration
+    simply resumes on the next start.
+    """
+    inspector = inspect(engine)
+    if "vm_status" not in inspector.get_table_names():
+        return
+    cpu = next(col for col in inspector.get_columns("vm_status") if col["name"] == "cpu_utilization")
+    if not isinstance(cpu["type"], String):
+        return
+    if engine.dialect.name != "mysql":
+        logger.warning("vm_status.cpu_utilization is still a string column; migrate it by hand on %s", engine.dialect.name)
+        return
+
+    disk_usage = Base.metadata.tables["vm_disk_usage"]
+    last_id = 0
+    backfilled = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                text(
+                    "SELECT s.id, s.disk_utilization FROM vm_status s"
+                    " WHERE s.id > :last_id AND s.disk_utilization IS NOT NULL"
+                    " AND NOT EXISTS (SELECT 1 FROM vm_disk_usage d WHERE d.status_id = s.id)"
+                    " ORDER BY s.id LIMIT :batch_size"
+                ),
+                {"last_id": last_id, "batch_size": batch_size},
+            ).all()
+            if not rows:
+                break
+            disk_rows = [
+                {"status_id": status_id, "mount": mount[:100], "used_pct": used_pct}
+                for status_id, disk in rows
+                for mount, used_pct in parse_disk_utilization(disk).items()
+            ]
+            if disk_rows:
+                conn.execute(disk_usage.insert(), disk_rows)
+            backfilled += len(disk_rows)
+            last_id = rows[-1][0]
+    logger.info("Backfilled %d vm_disk_usage rows", backfilled)
+
+    column = Base.metadata.tables["vm_status"].c.cpu_utilization
+    with engine.begin() as conn:
+        conn.execute(text(
+            "UPDATE vm_status SET cpu_utilization = NULLIF(TRIM(REPLACE(cpu_utilization, '%', '')), '')"
+            " WHERE cpu_utilization IS NOT NULL"
+        ))
+        conn.execute(text(
+            "UPDATE vm_status SET cpu_utilization = NULL"
+            " WHERE cpu_utilization NOT REGEXP '^-?[0-9]+([.][0-9]+)?$'"
+        ))
+        ddl = CreateColumn(column).compile(dialect=engine.dialect)
+        logger.info("Converting vm_status.cpu_utilization to %s", column.type)
+        conn.execute(text(f"ALTER TABLE vm_status MODIFY COLUMN {ddl}"))
+
+
+def prepare_database(engine: Engine):
+    """
+    Create missing tables and run the migrations above, in order. Called from the
+    app's lifespan, or once per rollout with `python -m app.database.migrate`.
+    Every worker calls it at startup, so it runs under a named lock: the first
+    one migrates, the others wait and then find nothing left to do.
+    """
+    from app.models import vm_master, vm_status, vm_status_rollup  # noqa: F401  register their tables
+
+    with named_lock(engine, "prepare_database"):
+        Base.metadata.create_all(bind=engine)
+        add_missing_columns(engine)
+        add_missing_indexes(engine)
+        migrate_typed_metrics(engine)
+        backfill_latest_status(engine)
+
+
+if __name__ == "__main__":
+    from .db import engine
+
+    logging.basicConfig(level=logging.INFO)
+    prepare_database(engine)
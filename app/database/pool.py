@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolStats:
+    """Checkout counters of one connection pool; wait times are kept for the last `window` checkouts."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.overflow_checkouts = 0
+        self.peak_in_use = 0
+        self.max_wait = 0.0
+
+    def record_checkout(self, wait: float, in_use: int, overflowed: bool):
+        with self._lock:
+            self.checkouts += 1
+            self._waits.append(wait)
+            self.max_wait = max(self.max_wait, wait)
+            self.peak_in_use = max(self.peak_in_use, in_use)
+            self.overflow_checkouts += overflowed
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "peak_in_use": self.peak_in_use,
+                "wait_ms": {
+                    "avg": round(1000 * sum(waits) / len(waits), 3) if waits else None,
+                    "p95": round(1000 * waits[int(len(waits) * 0.95)], 3) if waits else None,
+                    "max": round(1000 * self.max_wait, 3),
+                },
+            }
+
+
+class _InstrumentedPool:
+    """Times every checkout, including the wait for a free connection when the pool is exhausted."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_checkout(time.perf_counter() - started, self.checkedout(), self.overflow() > 0)
+        return connection
+
+    def status_dict(self) -> Dict[str, Any]:
+        return {
+            "size": self.size(),
+            "idle": self.checkedin(),
+            "in_use": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            **self.stats.snapshot(),
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(engine) -> Dict[str, Any]:
+    pool = engine.pool
+    if isinstance(pool, _InstrumentedPool):
+        return pool.status_dict()
+    return {"status": pool.status()}
@@ -1,2 +1,2 @@
-from .common import show, get_user_by_id #noqa
+from .common import show, get_user_by_id, get_user_by_id_async #noqa
 from .upload import upload_file  #noqa
\ No newline at end of file
@@ -1,9 +1,14 @@
+import base64
+import json
 import logging
+from datetime import datetime
 from pprint import pformat
-from typing import Any
+from typing import Any, Optional
 from pydantic import BaseModel
 from app.models import User
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas import UserInDB
 from app.core import settings
 from cryptography.fernet import Fernet
@@ -30,6 +35,12 @@ def get_user_by_id(db:Session,id:int):
         return None
     else:
         return UserInDB.model_validate(user).model_dump()
+
+async def get_user_by_id_async(db: AsyncSession, id: int):
+    user = await db.scalar(select(User).where(User.id == id))
+    if not user:
+        return None
+    return UserInDB.model_validate(user).model_dump()
     
 
 
@@ -39,3 +50,40 @@ def encrypt_password(password: str) -> str:
 def decrypt_password(token: str) -> str:
     return fernet.decrypt(token.encode()).decode()
 
+
+def parse_percent(value) -> Optional[float]:
+    """12.5, "12.5" or "12.5%" -> 12.5; None, "", "N/A" -> None."""
+    if value is None:
+        return None
+    try:
+        return float(str(value).strip().rstrip('%'))
+    except ValueError:
+        return None
+
+
+def parse_disk_utilization(value) -> dict:
+    """
+    vm_status.disk_utilization as written by the collectors -- a JSON object such as
+    {"sda1": "45%"} or the older "sda1 45%;sdb1 3%" form -- as {name: 45.0}.
+    """
+    if not value:
+        return {}
+    try:
+        disks = json.loads(value)
+    except ValueError:
+        disks = dict(part.rsplit(" ", 1) for part in value.split(";") if " " in part)
+    if not isinstance(disks, dict):
+        return {}
+    parsed = {name: parse_percent(pct) for name, pct in disks.items()}
+    return {name: pct for name, pct in parsed.items() if pct is not None}
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for the (created_at, id) ordering of vm_status listings."""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce."""
+    created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    return datetime.fromisoformat(created_at), int(row_id)
@@ -4,5 +4,8 @@ CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))       # /app/core
 PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "../../"))  # /project-dir
 LOGS_DIR = os.path.join(PROJECT_ROOT, "uploads", "logs")
 LOGS_URL = f"{settings.base_url}/uploads/logs"
-if not os.path.exists(LOGS_DIR):
-    os.makedirs(LOGS_DIR)
\ No newline at end of file
+
+
+def ensure_dirs():
+    """Create the upload directories; run on startup, not on import."""
+    os.makedirs(LOGS_DIR, exist_ok=True)
@@ -2,10 +2,11 @@ from fastapi import UploadFile,Request
 import uuid
 from pathlib import Path
 import shutil
+from app.helper.path import LOGS_DIR
 
 
-UPLOAD_DIR = Path("uploads/logs")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# the directory served under /files, whatever the working directory is
+UPLOAD_DIR = Path(LOGS_DIR)
 
 
 
@@ -1,18 +1,49 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends,UploadFile,File,Request
+from fastapi.responses import PlainTextResponse
 from app.helper import upload_file
 from app.database import get_db
 from sqlalchemy import text
-from app.database import engine
-from app.models import Base
+from app.database import engine, async_engine
+from app.database.migrate import prepare_database
 from sqlalchemy.orm import Session
-from app.routers import users,vm_master,vm_status,monitor,logs
+from app.routers import users,vm_master,vm_status,monitor,logs,ingest,internal
 from fastapi.staticfiles import StaticFiles
 from app.core.auth import get_current_user   
 from fastapi.middleware.cors import CORSMiddleware
-from app.helper.path import LOGS_DIR
+from app.helper.path import LOGS_DIR, ensure_dirs
+from app.utils.pinger import start_ping_sweeper, stop_ping_sweeper
+from app.utils.ssh_pool import ssh_pool
+from app.utils.rollup import start_rollup_job, stop_rollup_job
+from app.utils.collector import start_collector_job, stop_collector_job
+from app.core.security import shutdown_password_pool
+from app.core.metrics import MetricsMiddleware, QueryCountMiddleware, request_metrics
+from app.core.config import settings
 
-Base.metadata.create_all(bind=engine)
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # importing the app does no I/O; everything with side effects starts here
+    ensure_dirs()
+    if settings.db_auto_migrate:
+        await asyncio.to_thread(prepare_database, engine)
+    start_ping_sweeper()
+    start_rollup_job()
+    start_collector_job()
+    try:
+        yield
+    finally:
+        await stop_ping_sweeper()
+        await stop_rollup_job()
+        await stop_collector_job()
+        shutdown_password_pool()
+        ssh_pool.close_all()
+        engine.dispose()
+        await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
  
 origins = ["*","10.0.5.22","http://localhost","http://localhost:3000"]
 app.add_middleware(
@@ -21,16 +52,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Query-Count", "X-Query-Time-Ms"],
 )
+app.add_middleware(QueryCountMiddleware)
+app.add_middleware(MetricsMiddleware)
 
-app.mount("/files", StaticFiles(directory=LOGS_DIR), name="log_files")
+app.mount("/files", StaticFiles(directory=LOGS_DIR, check_dir=False), name="log_files")
 
 app.include_router(users.auth)
 app.include_router(users.user)
 app.include_router(vm_master.router)
 app.include_router(vm_status.router)
+app.include_router(ingest.router)
 app.include_router(monitor.router)
 app.include_router(logs.router)
+app.include_router(internal.router)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape target; counters are per worker process."""
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
 def root():
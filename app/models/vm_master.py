@@ -16,6 +16,8 @@ class VMMaster(Base):
     cluster = Column(String(200), nullable=True)
     node = Column(String(100), nullable=True)
     remarks = Column(String(500), nullable=True)
+    probe_method = Column(String(10), nullable=True)  # icmp / tcp / auto, NULL = settings.probe_method
+    os_type = Column(String(20), nullable=True)  # linux / windows, detected on the first metrics collection
     created_at = Column(DateTime(timezone=True), default=datetime.now)
     updated_at = Column(DateTime(timezone=True), default=datetime.now, onupdate=datetime.now)
     is_active = Column(Integer, default=1, nullable=True)
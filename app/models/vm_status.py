@@ -1,20 +1,57 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, func, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, func, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class VMStatus(Base):
     __tablename__ = "vm_status"
+    __table_args__ = (
+        Index("ix_vm_status_vm_created", "vm_id", "created_at"),
+        Index("ix_vm_status_active_created", "is_active", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     vm_id = Column(Integer, ForeignKey('vm_master.id'), nullable=False)
     ip = Column(String(50), nullable=False)
     status = Column(String(20), nullable=False)
     os = Column(String(50), nullable=True)
-    cpu_utilization = Column(String(50), nullable=True)
+    cpu_utilization = Column(Float, nullable=True)
     memory_utilization = Column(Float, nullable=True)
-    disk_utilization = Column(String(200), nullable=True)
+    disk_utilization = Column(String(200), nullable=True)  # as reported; queries use vm_disk_usage
     created_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
     is_active = Column(Boolean, server_default="1", nullable=False)
+    # random per multi-row INSERT, so the writer can find its own rows' ids (crud/vm_status.py)
+    insert_batch = Column(BigInteger, nullable=True)
 
     vm_master = relationship("VMMaster", back_populates="vm_statuses")
+    disks = relationship("VMDiskUsage", back_populates="vm_status", cascade="all, delete-orphan")
+
+
+class VMDiskUsage(Base):
+    """One row per mount of a vm_status sample, parsed from its disk_utilization."""
+    __tablename__ = "vm_disk_usage"
+    __table_args__ = (
+        Index("ix_vm_disk_usage_status_pct", "status_id", "used_pct"),
+        UniqueConstraint("status_id", "mount", name="uq_vm_disk_usage_status_mount"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    status_id = Column(Integer, ForeignKey('vm_status.id', ondelete="CASCADE"), nullable=False)
+    mount = Column(String(100), nullable=False)
+    used_pct = Column(Float, nullable=False)
+
+    vm_status = relationship("VMStatus", back_populates="disks")
+
 
+class VMStatusLatest(Base):
+    """The newest vm_status row of each VM, upserted with every status insert."""
+    __tablename__ = "vm_status_latest"
+
+    vm_id = Column(Integer, ForeignKey('vm_master.id'), primary_key=True, autoincrement=False)
+    status_id = Column(Integer, nullable=False)
+    ip = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False)
+    os = Column(String(50), nullable=True)
+    cpu_utilization = Column(Float, nullable=True)
+    memory_utilization = Column(Float, nullable=True)
+    disk_utilization = Column(String(200), nullable=True)
+    created_at = Column(DateTime, nullable=False)
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import declared_attr
+from app.database import Base
+
+
+class RollupColumns:
+    """Per VM per bucket aggregates of vm_status, maintained by app/crud/vm_status_rollup.py."""
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    bucket = Column(DateTime, nullable=False)  # start of the hour / day
+    samples = Column(Integer, nullable=False)
+    up_samples = Column(Integer, nullable=False)
+    up_ratio = Column(Float, nullable=False)
+    cpu_min = Column(Float, nullable=True)
+    cpu_avg = Column(Float, nullable=True)
+    cpu_max = Column(Float, nullable=True)
+    memory_min = Column(Float, nullable=True)
+    memory_avg = Column(Float, nullable=True)
+    memory_max = Column(Float, nullable=True)
+    disk_max = Column(Float, nullable=True)
+
+    @declared_attr
+    def vm_id(cls):
+        return Column(Integer, ForeignKey('vm_master.id'), nullable=False)
+
+
+class VMStatusHourly(RollupColumns, Base):
+    __tablename__ = "vm_status_hourly"
+    __table_args__ = (UniqueConstraint("vm_id", "bucket", name="uq_vm_status_hourly_vm_bucket"),)
+
+
+class VMStatusDaily(RollupColumns, Base):
+    __tablename__ = "vm_status_daily"
+    __table_args__ = (UniqueConstraint("vm_id", "bucket", name="uq_vm_status_daily_vm_bucket"),)
+
+
+class VMStatusRollupDirty(Base):
+    """
+    Hours whose vm_status samples were added, changed or deleted since they were
+    last compacted. Written by the status writers, consumed by compact_rollups.
+    """
+    __tablename__ = "vm_status_rollup_dirty"
+
+    bucket = Column(DateTime, primary_key=True)  # start of the hour
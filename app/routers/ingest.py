@@ -0,0 +1,89 @@
+import time
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from app.database import SessionLocal
+from app.schemas.vm_status import VMStatusIngest, VMStatusIngestResult
+from app.crud.vm_status import store_vm_statuses
+from app.core.auth import verify_internal_token
+from app.core.config import settings
+
+router = APIRouter(
+    prefix="/status",
+    tags=["VM Status"],
+    dependencies=[Depends(verify_internal_token)]
+)
+
+MAX_REPORTED_ERRORS = 100
+
+
+def _store(rows: list[dict]):
+    db = SessionLocal()
+    try:
+        return store_vm_statuses(db, rows)
+    finally:
+        db.close()
+
+
+@router.post("/ingest", response_model=VMStatusIngestResult)
+async def ingest_statuses(request: Request):
+    """
+    Push path for agents and relays: the body is newline-delimited JSON, one
+    VMStatusIngest per line; `created_at` is when the sample was taken (now if
+    omitted, clamped to now if ahead). Lines are parsed as they arrive and written to
+    vm_status in micro-batches of `ingest_batch_size` rows (or every
+    `ingest_flush_interval` seconds on slow streams), so the body is never held
+    in memory. Bad lines are reported by line number; the rest are stored.
+    """
+    result = {"lines": 0, "inserted": 0, "failed": 0, "errors": []}
+    batch: list[dict] = []
+    batch_lines: list[int] = []
+    last_flush = time.monotonic()
+
+    def fail(line_no: int, error):
+        result["failed"] += 1
+        if len(result["errors"]) < MAX_REPORTED_ERRORS:
+            result["errors"].append({"index": line_no, "error": error})
+
+    def parse(line: bytes):
+        line = line.strip()
+        if not line:
+            return
+        result["lines"] += 1
+        try:
+            batch.append(VMStatusIngest.model_validate_json(line).model_dump())
+            batch_lines.append(result["lines"])
+        except ValidationError as e:
+            fail(result["lines"], e.errors(include_url=False, include_input=False, include_context=False))
+
+    async def flush():
+        nonlocal batch, batch_lines, last_flush
+        rows, lines = batch, batch_lines
+        batch, batch_lines = [], []
+        last_flush = time.monotonic()
+        if not rows:
+            return
+        inserted, errors = await run_in_threadpool(_store, rows)
+        result["inserted"] += inserted
+        for index, error in errors:
+            fail(lines[index], error)
+
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        if len(pending) > settings.ingest_max_line_bytes:
+            await flush()
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Line {result['lines'] + 1} exceeds {settings.ingest_max_line_bytes} bytes",
+            )
+        for line in lines:
+            parse(line)
+            if len(batch) >= settings.ingest_batch_size:
+                await flush()
+        if batch and time.monotonic() - last_flush >= settings.ingest_flush_interval:
+            await flush()
+    parse(pending)
+    await flush()
+    return result
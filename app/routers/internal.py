@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+from app.core.auth import verify_internal_token, user_cache
+from app.core.jwt import token_cache
+from app.core.security import password_pool_stats
+from app.database import engine, async_engine
+from app.database.pool import pool_status
+from app.database.instrument import query_stats
+from app.utils.rollup import get_last_run
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["Internal"],
+    dependencies=[Depends(verify_internal_token)]
+)
+
+
+@router.get("/stats")
+def read_internal_stats():
+    """In-process counters (caches, pools, background jobs) of this worker."""
+    return {
+        "user_cache": user_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "password_pool": password_pool_stats(),
+        "db_pool": {"sync": pool_status(engine), "async": pool_status(async_engine.sync_engine)},
+        "sql": query_stats.snapshot(),
+        "rollup": get_last_run(),
+    }
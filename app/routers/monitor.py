@@ -1,81 +1,57 @@
-import threading
-import time
-import subprocess
-import platform
-from fastapi import APIRouter,Depends,Header, HTTPException, status
+from fastapi import APIRouter,Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.crud.vm_master import get_all_master_vms
-from app.core.auth import get_current_user  
+from app.crud.vm_master import get_master_vm_by_ip, remember_os_type
+from app.core.auth import get_current_user, verify_internal_token
 from app.schemas.monitor import VMRequest
 from app.utils.ssh_client import check_vm
-from app.core.config import settings
+from app.utils.pinger import get_vm_status_cache, get_last_sweep
+from app.utils.collector import start_collection, get_last_report, CollectionInProgress
+from app.utils.probe import check_reachable
 
 router = APIRouter(prefix="/monitor", tags=["VM Monitoring"]) #, dependencies=[Depends(get_current_user)]
 
-# Global dictionary to store VM reachability status
-
-INTERNAL_API_TOKEN = settings.internal_token
-
-def verify_internal_token(internal_token: str = Header(None)):
-    if internal_token != INTERNAL_API_TOKEN:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Unauthorized access",
-        )
-vm_status_cache = {}
-
-def ping_ip(ip: str) -> bool:
-    """Ping an IP address and return True if reachable, False otherwise."""
-    try:
-        system = platform.system()
-        if system == "Windows":
-            cmd = ["ping", "-n", "1", "-w", "1000", ip]
-        else:  # Linux, Mac
-            cmd = ["ping", "-c", "1", "-W", "1", ip]
-        result = subprocess.run(
-            cmd,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-        return result.returncode == 0
-    except Exception:
-        return False
-
-def monitor_vms(db_session_factory):
-    while True:
-        db: Session = next(db_session_factory())
-        vms = get_all_master_vms(db)
-        for vm in vms:
-            ip = vm.ip
-            status = ping_ip(ip)
-            vm_status_cache[ip] = {"vm_ip":ip,"vm_name": vm.vm_name, "reachable": status}
-        db.close()
-        time.sleep(1)
-
-def start_monitoring_thread(db_session_factory):
-    thread = threading.Thread(target=monitor_vms, args=(db_session_factory,), daemon=True)
-    thread.start()
-
-# Start the monitoring thread when the module is imported
-start_monitoring_thread(get_db)
-
 @router.get("/ping",)
 def get_vm_status(dependencies=Depends(get_current_user)):
     """API endpoint to get the latest reachability status of all VMs."""
-    return list(vm_status_cache.values())
+    return get_vm_status_cache()
+
+@router.get("/ping/sweep")
+def get_ping_sweep(dependencies=Depends(get_current_user)):
+    """Timing summary of the last background reachability sweep."""
+    return get_last_sweep()
 
 @router.post("/utilization")
-def vm_status(request: VMRequest,dependencies=Depends(verify_internal_token)):
-    return check_vm(request.ip, request.username, request.password)
+def vm_status(request: VMRequest,dependencies=Depends(verify_internal_token), db: Session = Depends(get_db)):
+    vm = get_master_vm_by_ip(db, request.ip)
+    result = check_vm(request.ip, request.username, request.password, request.probe_method, vm.os_type if vm else None)
+    if vm:
+        remember_os_type(db, vm, result["os"])
+    return result
+
+
+@router.post("/collect", status_code=202)
+def collect_metrics(dependencies=Depends(verify_internal_token)):
+    """
+    Start collecting metrics from every active VM in the background, one vm_status
+    row each. Progress and the result are in GET /monitor/collect/report.
+    """
+    try:
+        return {"detail": "Metrics collection started", "in_progress": start_collection()}
+    except CollectionInProgress:
+        raise HTTPException(status_code=409, detail="A metrics collection is already running")
 
+@router.get("/collect/report")
+def collect_report(dependencies=Depends(get_current_user)):
+    """Timing report of the last metrics collection, per host, and the progress of a running one."""
+    return get_last_report()
 
 @router.post("/ping_status")
 def ping_status(request: VMRequest,dependencies=Depends(get_current_user)):
     """End ping to get the status of the induvisual vm"""
     ip = request.ip
-    status = ping_ip(ip)
-    return {"ip": ip, "reachable": status}
+    status, method = check_reachable(ip, request.probe_method)
+    return {"ip": ip, "reachable": status, "method": method}
 
 # @router.post("/snmp_ping_status")
 # def snmp_ping_status(request: VMRequest):  #,dependencies=Depends(get_current_user)
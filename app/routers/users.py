@@ -3,39 +3,65 @@ from app.schemas import UserCreate,UserResponse, Token
 from app.crud import insert_user,get_user_by_email
 from fastapi import APIRouter
 from fastapi.security import OAuth2PasswordRequestForm
-from app.core import verify_password
 from sqlalchemy.orm import Session
 from fastapi import Depends, HTTPException
-from app.core import hash_password, refresh_token, create_token, decode_token
+from fastapi.concurrency import run_in_threadpool
+from app.core import refresh_token, create_token, decode_token
+from app.core import hash_password_async, verify_and_update_password_async, PasswordWorkersBusy
 from app.core.auth import get_current_user
 
 
 auth  = APIRouter(prefix="/auth", tags=["Auth"])
 user  = APIRouter(prefix="/users", tags=["Users Module"])
 
-@user.post("/create", response_model= UserResponse)
-def create_user(userdata:UserCreate, db:Session = Depends(get_db)):
-    is_exist = get_user_by_email(db, userdata.email)
-    if is_exist:
-        raise HTTPException(status_code=409, detail="Email already registerd")
-    data = userdata.model_dump(exclude={"password"})
-    data['password'] = hash_password(userdata.password)
+def _password_workers_busy():
+    return HTTPException(
+        status_code=503,
+        detail="Too many password checks in progress, retry shortly.",
+        headers={"Retry-After": "1"},
+    )
+
+def _store_user(db: Session, data: dict):
     user = insert_user(db,data)
     db.commit()
     db.refresh(user)
     return user
 
+@user.post("/create", response_model= UserResponse)
+async def create_user(userdata:UserCreate, db:Session = Depends(get_db)):
+    is_exist = await run_in_threadpool(get_user_by_email, db, userdata.email)
+    if is_exist:
+        raise HTTPException(status_code=409, detail="Email already registerd")
+    data = userdata.model_dump(exclude={"password"})
+    try:
+        data['password'] = await hash_password_async(userdata.password)
+    except PasswordWorkersBusy:
+        raise _password_workers_busy()
+    return await run_in_threadpool(_store_user, db, data)
+
  
 
 @auth.post("/login", response_model=Token)
-def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """
     OAuth2 spec expects 'username' + 'password' form fields.
     We treat 'username' as the user's email.
+    Password checks run in the bcrypt process pool; when too many are queued
+    the request is refused with 503 and Retry-After instead of waiting.
     """
-    user = get_user_by_email(db, form.username)
-    if not user or not verify_password(form.password, user.password):
+    user = await run_in_threadpool(get_user_by_email, db, form.username)
+    if not user:
+        raise HTTPException(status_code=400, detail="Incorrect email or password.")
+    try:
+        valid, new_hash = await verify_and_update_password_async(form.password, user.password)
+    except PasswordWorkersBusy:
+        raise _password_workers_busy()
+    if not valid:
         raise HTTPException(status_code=400, detail="Incorrect email or password.")
+    if new_hash:
+        # stored with an outdated bcrypt cost
+        user.password = new_hash
+        await run_in_threadpool(db.commit)
 
     # If you store scopes/roles somewhere (e.g., user.scopes), include them here:
     scopes = getattr(user, "scopes", []) or []
@@ -45,7 +71,7 @@ def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get
     return Token(access_token=access, refresh_token=refresh)
 
 @user.get("/me", response_model=UserResponse)
-def read_me(current_user = Depends(get_current_user)):
+async def read_me(current_user = Depends(get_current_user)):
 
     return current_user
 
@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_async_db
 from app.schemas.vm_master import VMMasterCreate, VMMasterUpdate, VMMasterResponse
 from app.crud.vm_master import (
-    get_all_master_vms,
     add_vm,
     update_master_vm,
     delete_master_vm,
-    get_master_vm_by_id,
+    get_all_master_vms_async,
+    get_master_vm_by_id_async,
 )
 
 from app.core.auth import get_current_user
@@ -19,12 +20,12 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=list[VMMasterResponse])
-def read_vms(db: Session = Depends(get_db)):
-    return get_all_master_vms(db)
+async def read_vms(db: AsyncSession = Depends(get_async_db)):
+    return await get_all_master_vms_async(db)
 
 @router.get("/{vm_id}", response_model=VMMasterResponse)
-def read_vm(vm_id: int, db: Session = Depends(get_db)):
-    vm = get_master_vm_by_id(db, vm_id)
+async def read_vm(vm_id: int, db: AsyncSession = Depends(get_async_db)):
+    vm = await get_master_vm_by_id_async(db, vm_id)
     if not vm:
         raise HTTPException(status_code=404, detail="VM not found")
     return vm
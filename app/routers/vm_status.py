@@ -1,16 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+import json
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import Any, Literal
 from sqlalchemy.orm import Session
-from datetime import date
-from app.database import get_db
-from app.schemas.vm_status import VMStatusCreate, VMStatusUpdate, VMStatusResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime
+from app.database import get_db, get_async_db, SessionLocal
+from app.schemas.vm_status import (
+    VMStatusCreate,
+    VMStatusUpdate,
+    VMStatusResponse,
+    VMStatusSlimResponse,
+    VMStatusLatestResponse,
+    VMStatusBulkResult,
+    VMStatusRollupResponse,
+    VMDiskAlertResponse,
+)
 from app.crud.vm_status import (
-    get_all_vm_statuses,
-    get_vm_status_by_id,
+    get_all_vm_statuses_async,
+    get_vm_status_by_id_async,
     create_vm_status,
+    bulk_create_vm_statuses,
     update_vm_status,
     delete_vm_status,
+    get_disk_alerts,
+    get_latest_vm_statuses_async,
+    iter_vm_statuses,
+    EXPORT_COLUMNS,
 )
+from app.crud.vm_status_rollup import get_rollups
 from app.core.auth import get_current_user
+from app.core.config import settings
+from app.helper.common import encode_cursor, decode_cursor
 
 router = APIRouter(
     prefix="/status",
@@ -22,13 +45,139 @@ router = APIRouter(
 # def read_vm_statuses(db: Session = Depends(get_db)):
 #     return get_all_vm_statuses(db)
 
+async def status_page_filters(
+    date_filter: date | None = None,
+    vm_id: int | None = None,
+    start: datetime | None = Query(None, alias="from"),
+    end: datetime | None = Query(None, alias="to"),
+    limit: int | None = Query(None, ge=1),
+    cursor: str | None = None,
+):
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {
+        "date_filter": date_filter,
+        "vm_id": vm_id,
+        "start": start,
+        "end": end,
+        "limit": min(limit or settings.status_page_size, settings.status_max_page_size),
+        "after": after,
+    }
+
+async def _status_page(db: AsyncSession, response: Response, filters: dict, with_master: bool):
+    limit = filters["limit"]
+    rows = await get_all_vm_statuses_async(db, **{**filters, "limit": limit + 1}, with_master=with_master)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows
+
 @router.get("/", response_model=list[VMStatusResponse])
-def read_vm_statuses(db: Session = Depends(get_db), date_filter: date | None = None):
-    return get_all_vm_statuses(db, date_filter)
+async def read_vm_statuses(
+    response: Response,
+    filters: dict = Depends(status_page_filters),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Statuses of one day (`date_filter`, default today) or of a `from`/`to` range,
+    optionally for a single `vm_id`, oldest first. Results come in pages of
+    `limit` rows; when there are more, the X-Next-Cursor response header holds
+    the `cursor` to pass for the next page.
+    """
+    return await _status_page(db, response, filters, with_master=True)
+
+@router.get("/slim", response_model=list[VMStatusSlimResponse])
+async def read_vm_statuses_slim(
+    response: Response,
+    filters: dict = Depends(status_page_filters),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Same as GET /status/ without the embedded vm_master, so vm_master is never queried."""
+    return await _status_page(db, response, filters, with_master=False)
+
+@router.get("/latest", response_model=list[VMStatusLatestResponse])
+async def read_latest_vm_statuses(
+    project: str | None = None,
+    cluster: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Current state of every active VM: one row per VM from vm_status_latest, whatever the history size."""
+    return await get_latest_vm_statuses_async(db, project, cluster)
+
+def _export_lines(fmt: str, start: datetime, end: datetime, vm_id: int | None):
+    # runs after the request's dependencies are gone, so it owns its session
+    db = SessionLocal()
+    try:
+        names = [column.key for column in EXPORT_COLUMNS]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == "csv":
+            writer.writerow(names)
+        for rows in iter_vm_statuses(db, start, end, vm_id):
+            if fmt == "csv":
+                writer.writerows(rows)
+            else:
+                for row in rows:
+                    record = dict(zip(names, row))
+                    record["created_at"] = record["created_at"].isoformat()
+                    buffer.write(json.dumps(record))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+@router.get("/export")
+def export_vm_statuses(
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    vm_id: int | None = None,
+    format: Literal["csv", "ndjson"] = "csv",
+):
+    """
+    Stream every active status in [`from`, `to`) as CSV or NDJSON, oldest first.
+    Rows are read from a server-side cursor and written out batch by batch, so
+    memory use does not depend on the size of the range.
+    """
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"vm_status_{start:%Y%m%d}_{end:%Y%m%d}.{format}"
+    return StreamingResponse(
+        _export_lines(format, start, end, vm_id),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/disk-alerts", response_model=list[VMDiskAlertResponse])
+def read_disk_alerts(
+    threshold: float = Query(90, ge=0, le=100),
+    date_filter: date | None = None,
+    db: Session = Depends(get_db),
+):
+    """VMs with any mount above `threshold`% used on the day, highest first."""
+    return get_disk_alerts(db, threshold, date_filter)
+
+@router.get("/rollup/{granularity}", response_model=list[VMStatusRollupResponse])
+def read_vm_status_rollups(
+    granularity: Literal["hourly", "daily"],
+    vm_id: int | None = None,
+    start: datetime | None = Query(None, alias="from"),
+    end: datetime | None = Query(None, alias="to"),
+    limit: int = Query(10000, ge=1, le=100000),
+    db: Session = Depends(get_db),
+):
+    """Per VM hourly or daily aggregates (min/avg/max CPU and memory, max disk, up ratio) for long ranges."""
+    return get_rollups(db, granularity, vm_id, start, end, limit)
 
 @router.get("/{status_id}", response_model=VMStatusResponse)
-def read_vm_status(status_id: int, db: Session = Depends(get_db)):
-    vm_status = get_vm_status_by_id(db, status_id)
+async def read_vm_status(status_id: int, db: AsyncSession = Depends(get_async_db)):
+    vm_status = await get_vm_status_by_id_async(db, status_id)
     if not vm_status:
         raise HTTPException(status_code=404, detail="VM status not found")
     return vm_status
@@ -37,6 +186,22 @@ def read_vm_status(status_id: int, db: Session = Depends(get_db)):
 def create_status(vm_status_data: VMStatusCreate, db: Session = Depends(get_db)):
     return create_vm_status(db, vm_status_data)
 
+@router.post("/bulk", response_model=VMStatusBulkResult)
+def create_statuses_bulk(
+    items: list[dict[str, Any]] = Body(..., description="VMStatusCreate objects"),
+    db: Session = Depends(get_db),
+):
+    """
+    Insert many statuses in one transaction. Items are validated one by one;
+    invalid ones are reported in `errors` by index while the rest are stored.
+    """
+    if len(items) > settings.status_bulk_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.status_bulk_max_items} statuses per request",
+        )
+    return bulk_create_vm_statuses(db, items)
+
 @router.put("/{status_id}", response_model=VMStatusResponse)
 def update_status(status_id: int, vm_status_update: VMStatusUpdate, db: Session = Depends(get_db)):
     vm_status = update_vm_status(db, status_id, vm_status_update)
@@ -1,8 +1,9 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Literal
 
 
 class VMRequest(BaseModel):
     ip: str
     username: Optional[str] = None
-    password: Optional[str] = None
\ No newline at end of file
+    password: Optional[str] = None
+    probe_method: Optional[Literal["icmp", "tcp", "auto"]] = None
\ No newline at end of file
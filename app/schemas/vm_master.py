@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, Literal
 from datetime import datetime
 
 class VMMasterBase(BaseModel):
@@ -11,6 +11,7 @@ class VMMasterBase(BaseModel):
     cluster: Optional[str] = Field(None, max_length=200)
     node: Optional[str] = Field(None, max_length=100)
     remarks: Optional[str] = Field(None, max_length=500)
+    probe_method: Optional[Literal["icmp", "tcp", "auto"]] = None
     is_active: Optional[int] = 1  # Or use bool if you prefer
 
 class VMMasterCreate(VMMasterBase):
@@ -25,10 +26,12 @@ class VMMasterUpdate(BaseModel):
     cluster: Optional[str] = Field(None, max_length=200)
     node: Optional[str] = Field(None, max_length=100)
     remarks: Optional[str] = Field(None, max_length=500)
+    probe_method: Optional[Literal["icmp", "tcp", "auto"]] = None
     # is_active: Optional[int] = None  # Or bool
 
 class VMMasterResponse(VMMasterBase):
     id: int
+    os_type: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     
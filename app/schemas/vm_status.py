@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, Any
+from datetime import datetime, timedelta
 from app.schemas.vm_master import VMMasterResponse
+from app.core.config import settings
 
 class VMStatusBase(BaseModel):
     vm_id: int
@@ -15,6 +16,22 @@ class VMStatusBase(BaseModel):
 class VMStatusCreate(VMStatusBase):
     pass
 
+class VMStatusIngest(VMStatusBase):
+    # when the agent took the sample; replayed spool entries keep their own time
+    created_at: Optional[datetime] = None
+
+    @field_validator("created_at")
+    @classmethod
+    def sample_time(cls, value: Optional[datetime]):
+        if value is None:
+            return None
+        if value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)  # stored as naive server-local time
+        now = datetime.now()
+        if value < now - timedelta(seconds=settings.ingest_max_sample_age):
+            raise ValueError(f"created_at is more than {settings.ingest_max_sample_age:.0f}s in the past")
+        return min(value, now)  # agent clocks running ahead are clamped to now
+
 class VMStatusUpdate(BaseModel):
     status: Optional[str] = Field(None, max_length=20)
     os: Optional[str] = Field(None, max_length=50)
@@ -27,4 +44,66 @@ class VMStatusResponse(VMStatusBase):
     created_at: datetime
     vm_master: Optional[VMMasterResponse]
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class VMStatusSlimResponse(VMStatusBase):
+    id: int
+    created_at: datetime
+    class Config:
+        orm_mode = True
+
+class VMStatusLatestResponse(BaseModel):
+    vm_id: int
+    vm_name: str
+    project_name: str
+    cluster: Optional[str] = None
+    status_id: int
+    ip: str
+    status: str
+    os: Optional[str] = None
+    cpu_utilization: Optional[float] = None
+    memory_utilization: Optional[float] = None
+    disk_utilization: Optional[str] = None
+    created_at: datetime
+    class Config:
+        orm_mode = True
+
+class VMStatusBulkError(BaseModel):
+    index: int
+    error: Any
+
+class VMStatusBulkResult(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    errors: list[VMStatusBulkError]
+
+class VMStatusIngestResult(BaseModel):
+    lines: int
+    inserted: int
+    failed: int
+    errors: list[VMStatusBulkError]
+
+class VMStatusRollupResponse(BaseModel):
+    vm_id: int
+    bucket: datetime
+    samples: int
+    up_ratio: float
+    cpu_min: Optional[float] = None
+    cpu_avg: Optional[float] = None
+    cpu_max: Optional[float] = None
+    memory_min: Optional[float] = None
+    memory_avg: Optional[float] = None
+    memory_max: Optional[float] = None
+    disk_max: Optional[float] = None
+    class Config:
+        orm_mode = True
+
+class VMDiskAlertResponse(BaseModel):
+    vm_id: int
+    vm_name: str
+    mount: str
+    max_used_pct: float
+    last_seen: datetime
+    class Config:
+        orm_mode = True
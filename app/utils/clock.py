@@ -14,6 +14,10 @@ class DateTime():
     
 
 
-obj = DateTime()
-ist = obj.ist()
-utc = obj.utc()
\ No newline at end of file
+def ist():
+    """Current local time, formatted; evaluated per call rather than frozen at import."""
+    return DateTime().ist()
+
+
+def utc():
+    return DateTime().utc()
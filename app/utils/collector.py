@@ -0,0 +1,267 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pytz import timezone
+
+from app.core.config import settings
+from app.database import SessionLocal, engine
+from app.database.lock import LeaderLock
+from app.crud.vm_master import get_all_master_vms
+from app.crud.vm_status import insert_vm_statuses
+from app.models.vm_master import VMMaster
+from app.helper.common import decrypt_password
+from app.utils.ssh_client import check_vm
+
+logger = logging.getLogger("uvicorn.error")
+
+ist = timezone('Asia/Kolkata')
+
+_run_lock = threading.Lock()
+_last_report: Dict[str, Any] = {}
+_progress: Dict[str, Any] = {}
+_collect_task: Optional[asyncio.Task] = None
+# every worker runs the schedule, only the lock holder collects
+_leader = LeaderLock(engine, "vm_metrics_collection")
+
+
+class CollectionInProgress(Exception):
+    pass
+
+
+class Target:
+    """Plain copy of the vm_master fields a collection needs, detached from the session."""
+
+    def __init__(self, vm: VMMaster):
+        self.vm_id = vm.id
+        self.ip = vm.ip
+        self.username = vm.username
+        self.password = vm.password
+        self.probe_method = vm.probe_method
+        self.os_type = vm.os_type
+
+
+def _to_float(value) -> float:
+    try:
+        return float(str(value).rstrip('%')) if value is not None else 0
+    except ValueError:
+        return 0
+
+
+def collect_one(target: Target) -> Dict[str, Any]:
+    """
+    One vm_status row for `target`, built the way utils/vm.py always did: hosts
+    without credentials (or whose SSH login fails) only get a reachability probe.
+    """
+    if target.username and target.password:
+        data = check_vm(
+            target.ip,
+            target.username,
+            decrypt_password(target.password),
+            target.probe_method,
+            target.os_type,
+        )
+        if data.get("status") == "not reachable":
+            data = check_vm(target.ip, None, None, target.probe_method)
+    else:
+        data = check_vm(target.ip, None, None, target.probe_method)
+
+    row = {
+        "vm_id": target.vm_id,
+        "ip": target.ip,
+        "status": data.get("status", "unknown"),
+        "os": "unknown",
+        "cpu_utilization": 0,
+        "memory_utilization": 0,
+        "disk_utilization": "{}",
+    }
+    if data.get("os") in ("linux", "windows"):
+        os_type = data["os"]
+        disk_util = data.get("disk_utilization") or {}
+        if os_type == "linux":
+            disk_util = {k: v for k, v in disk_util.items() if k.startswith("sd")}
+        row.update(
+            os=os_type,
+            cpu_utilization=_to_float(data.get("cpu_utilization")),
+            memory_utilization=_to_float(data.get("memory_utilization")),
+            disk_utilization=json.dumps(disk_util),
+        )
+    return row
+
+
+def collect_targets(targets: List[Target], concurrency: Optional[int] = None) -> Dict[str, Any]:
+    """Run collect_one over `targets` on a bounded thread pool; rows are returned, not stored."""
+    rows: List[Dict[str, Any]] = []
+    hosts: List[Dict[str, Any]] = []
+
+    def timed(target: Target):
+        started = time.perf_counter()
+        try:
+            row, error = collect_one(target), None
+        except Exception as e:
+            row, error = None, str(e) or type(e).__name__
+        return target, row, error, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=concurrency or settings.collector_concurrency) as pool:
+        for target, row, error, seconds in pool.map(timed, targets):
+            if _progress:
+                _progress["done"] += 1
+            hosts.append({
+                "vm_id": target.vm_id,
+                "ip": target.ip,
+                "status": row["status"] if row else "failed",
+                "seconds": round(seconds, 3),
+                "error": error,
+            })
+            if row:
+                rows.append(row)
+    return {"rows": rows, "hosts": hosts}
+
+
+def run_collection() -> Dict[str, Any]:
+    """
+    Collect every active VM and store one vm_status row each, in a single batch.
+    Raises CollectionInProgress if another run has not finished yet.
+    """
+    if not _run_lock.acquire(blocking=False):
+        raise CollectionInProgress()
+    try:
+        return _collect()
+    finally:
+        _run_lock.release()
+
+
+def start_collection() -> Dict[str, Any]:
+    """
+    run_collection on a background thread, for POST /monitor/collect. Returns the
+    progress entry get_last_report shows until the run finishes.
+    """
+    if not _run_lock.acquire(blocking=False):
+        raise CollectionInProgress()
+
+    def run():
+        try:
+            _collect()
+        except Exception:
+            logger.exception("Metrics collection failed")
+        finally:
+            _run_lock.release()
+
+    _progress.update(started_at=datetime.now(ist).replace(tzinfo=None), hosts=None, done=0)
+    threading.Thread(target=run, name="metrics-collection", daemon=True).start()
+    return dict(_progress)
+
+
+def _collect() -> Dict[str, Any]:
+    global _last_report
+    try:
+        started_at = datetime.now(ist).replace(tzinfo=None)
+        started = time.perf_counter()
+        _progress.update(started_at=started_at, hosts=None, done=0)
+
+        db = SessionLocal()
+        try:
+            targets = [Target(vm) for vm in get_all_master_vms(db)]
+        finally:
+            db.close()
+        _progress["hosts"] = len(targets)
+
+        result = collect_targets(targets)
+        collected = time.perf_counter()
+
+        for row in result["rows"]:
+            row["created_at"] = started_at
+        db = SessionLocal()
+        try:
+            os_types = {row["vm_id"]: row["os"] for row in result["rows"] if row["os"] != "unknown"}
+            for target in targets:
+                if target.vm_id in os_types and os_types[target.vm_id] != target.os_type:
+                    db.query(VMMaster).filter(VMMaster.id == target.vm_id).update(
+                        {"os_type": os_types[target.vm_id]}, synchronize_session=False
+                    )
+            inserted, store_errors = insert_vm_statuses(db, result["rows"])
+        finally:
+            db.close()
+
+        hosts = result["hosts"]
+        _last_report = {
+            "started_at": started_at,
+            "duration_sec": round(time.perf_counter() - started, 3),
+            "collect_sec": round(collected - started, 3),
+            "store_sec": round(time.perf_counter() - collected, 3),
+            "hosts": len(hosts),
+            "succeeded": len(result["rows"]),
+            "failed": len(hosts) - len(result["rows"]),
+            "rows_inserted": inserted,
+            "store_errors": [
+                {"vm_id": result["rows"][index]["vm_id"], "error": error} for index, error in store_errors
+            ],
+            "slowest": sorted(hosts, key=lambda h: h["seconds"], reverse=True)[:20],
+            "per_host": hosts,
+        }
+        logger.info(
+            "Metrics collection: %d hosts in %.1fs, %d failed",
+            len(hosts), _last_report["duration_sec"], _last_report["failed"],
+        )
+        return _last_report
+    finally:
+        _progress.clear()
+
+
+def get_last_report() -> Dict[str, Any]:
+    """The last finished run; while one is going, its progress is under "in_progress"."""
+    report = dict(_last_report)
+    if _progress:
+        report["in_progress"] = dict(_progress)
+    return report
+
+
+async def _collect_loop():
+    loop = asyncio.get_running_loop()
+    next_run = loop.time()
+    try:
+        while True:
+            leader = False
+            try:
+                leader = await asyncio.to_thread(_leader.held)
+                if leader:
+                    await asyncio.to_thread(run_collection)
+            except asyncio.CancelledError:
+                raise
+            except CollectionInProgress:
+                logger.info("Skipping scheduled metrics collection, one is already running")
+            except Exception:
+                logger.exception("Scheduled metrics collection failed")
+            now = loop.time()
+            if leader:
+                # fixed cadence, like the ping sweeper: a slow run shortens the following sleep
+                next_run = max(next_run + settings.collect_interval, now)
+            else:
+                # check again soon, so another worker takes over quickly when the leader goes away
+                next_run = now + min(settings.collect_interval, 60)
+            await asyncio.sleep(next_run - now)
+    finally:
+        _leader.release()
+
+
+def start_collector_job():
+    """Scheduled collection in this process, so the SSH pool stays warm between runs."""
+    global _collect_task
+    if settings.collect_interval > 0 and (_collect_task is None or _collect_task.done()):
+        _collect_task = asyncio.create_task(_collect_loop())
+
+
+async def stop_collector_job():
+    global _collect_task
+    if _collect_task is not None and not _collect_task.done():
+        _collect_task.cancel()
+        try:
+            await _collect_task
+        except asyncio.CancelledError:
+            pass
+    _collect_task = None
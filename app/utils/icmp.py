@@ -0,0 +1,279 @@
+import asyncio
+import ipaddress
+import math
+import platform
+import random
+import socket
+import struct
+import subprocess
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+_PAYLOAD = b"vm-monitor-probe"
+_MAX_SEQ = 0xFFFF
+# a sweep's replies arrive in a burst; the default receive buffer overflows at a few hundred hosts
+_RCVBUF = 4 << 20
+
+# "dgram" / "raw" once a socket could be opened, "" when only the subprocess path works
+_socket_mode: Optional[str] = None
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _build_echo(ident: int, seq: int) -> bytes:
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    checksum = _checksum(header + _PAYLOAD)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, ident, seq) + _PAYLOAD
+
+
+def _parse_reply(data: bytes, raw: bool) -> Optional[Tuple[int, int]]:
+    """Return (ident, seq) of an echo reply, None for any other ICMP message."""
+    if raw:
+        # raw sockets hand us the IP header as well
+        data = data[(data[0] & 0x0F) * 4:]
+    if len(data) < 8:
+        return None
+    icmp_type, _, _, ident, seq = struct.unpack("!BBHHH", data[:8])
+    if icmp_type != ICMP_ECHO_REPLY:
+        return None
+    return ident, seq
+
+
+def _open_socket() -> Tuple[socket.socket, bool]:
+    """
+    Prefer the unprivileged ICMP datagram socket (needs net.ipv4.ping_group_range to
+    cover our gid); fall back to a raw socket when running with CAP_NET_RAW.
+    """
+    global _socket_mode
+    if _socket_mode != "raw":
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+            _socket_mode = "dgram"
+            return sock, False
+        except OSError:
+            pass
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        _socket_mode = "raw"
+        return sock, True
+    except OSError:
+        _socket_mode = ""
+        raise
+
+
+def socket_available() -> bool:
+    if settings.ping_engine == "subprocess":
+        return False
+    if _socket_mode is None:
+        try:
+            _open_socket()[0].close()
+        except OSError:
+            pass
+    return bool(_socket_mode)
+
+
+def _is_ipv4(ip: str) -> bool:
+    try:
+        return isinstance(ipaddress.ip_address(ip), ipaddress.IPv4Address)
+    except ValueError:
+        return False
+
+
+def _build_ping_cmd(ip: str, timeout: float) -> List[str]:
+    if platform.system() == "Windows":
+        return ["ping", "-n", "1", "-w", str(int(timeout * 1000)), ip]
+    return ["ping", "-c", "1", "-W", str(max(1, math.ceil(timeout))), ip]
+
+
+def subprocess_ping(ip: str, timeout: float = 1.0) -> bool:
+    """Fallback: fork the system ping binary."""
+    try:
+        result = subprocess.run(
+            _build_ping_cmd(ip, timeout),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=timeout + 1,
+        )
+        return result.returncode == 0
+    except Exception:
+        return False
+
+
+async def async_subprocess_ping(ip: str, timeout: float = 1.0) -> bool:
+    """Fallback: the system ping binary, awaited instead of holding a thread."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *_build_ping_cmd(ip, timeout),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+    except Exception:
+        return False
+    try:
+        return await asyncio.wait_for(proc.wait(), timeout + 1) == 0
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return False
+    except asyncio.CancelledError:
+        proc.kill()
+        raise
+
+
+def ping_ip(ip: str, timeout: float = 1.0) -> bool:
+    """Blocking single-host echo over an ICMP socket, forking ping only if no socket can be opened."""
+    if not socket_available() or not _is_ipv4(ip):
+        return subprocess_ping(ip, timeout)
+    try:
+        sock, raw = _open_socket()
+    except OSError:
+        return subprocess_ping(ip, timeout)
+    ident = random.randint(0, 0xFFFF)
+    seq = random.randint(0, _MAX_SEQ)
+    deadline = time.monotonic() + timeout
+    try:
+        sock.sendto(_build_echo(ident, seq), (ip, 0))
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            sock.settimeout(remaining)
+            data, addr = sock.recvfrom(2048)
+            reply = _parse_reply(data, raw)
+            # the kernel rewrites the id of datagram sockets, so only raw replies carry ours
+            if reply and addr[0] == ip and reply[1] == seq and (not raw or reply[0] == ident):
+                return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+async def _socket_batch(targets: List[Tuple[str, str]], timeout: float) -> Dict[str, bool]:
+    """
+    Echo every (key, address) pair from a single socket and wait up to `timeout` for the
+    replies, which are matched back to their host by identifier and sequence number.
+    """
+    loop = asyncio.get_running_loop()
+    sock, raw = _open_socket()
+    sock.setblocking(False)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _RCVBUF)
+    except OSError:
+        pass
+    ident = random.randint(0, 0xFFFF)
+    pending: Dict[int, Tuple[str, str]] = {}
+    results = {key: False for key, _ in targets}
+    finished = loop.create_future()
+    all_sent = False
+
+    def on_readable():
+        while True:
+            try:
+                data, addr = sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                break
+            reply = _parse_reply(data, raw)
+            if reply is None or (raw and reply[0] != ident):
+                continue
+            target = pending.get(reply[1])
+            if target is None or target[1] != addr[0]:
+                continue
+            del pending[reply[1]]
+            results[target[0]] = True
+        if all_sent and not pending and not finished.done():
+            finished.set_result(None)
+
+    loop.add_reader(sock.fileno(), on_readable)
+    try:
+        for seq, (key, address) in enumerate(targets):
+            pending[seq] = (key, address)
+            packet = _build_echo(ident, seq)
+            while True:
+                try:
+                    sock.sendto(packet, (address, 0))
+                    break
+                except (BlockingIOError, InterruptedError):
+                    # send buffer full: give the reader a chance to drain replies
+                    await asyncio.sleep(0.001)
+                except OSError:
+                    pending.pop(seq, None)
+                    break
+        all_sent = True
+        if pending:
+            try:
+                await asyncio.wait_for(finished, timeout)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        loop.remove_reader(sock.fileno())
+        sock.close()
+    return results
+
+
+async def _resolve(ip: str) -> Optional[str]:
+    if _is_ipv4(ip):
+        return ip
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(ip, None, family=socket.AF_INET)
+        return infos[0][4][0]
+    except (OSError, IndexError):
+        return None
+
+
+async def probe_many(
+    ips: Iterable[str],
+    timeout: float,
+    concurrency: int = 256,
+    deadline: Optional[float] = None,
+) -> Dict[str, Optional[bool]]:
+    """
+    Reachability of many hosts at once. Uses one ICMP socket per batch of up to
+    65536 hosts; when no ICMP socket is allowed, forks `ping` with at most
+    `concurrency` processes in flight. Hosts not decided before `deadline`
+    (seconds) map to None.
+    """
+    ips = list(dict.fromkeys(ips))
+    results: Dict[str, Optional[bool]] = {ip: None for ip in ips}
+    if not ips:
+        return results
+
+    if socket_available():
+        addresses = await asyncio.gather(*(_resolve(ip) for ip in ips))
+        targets = [(ip, address) for ip, address in zip(ips, addresses) if address]
+        for ip, address in zip(ips, addresses):
+            if not address:
+                results[ip] = False
+        wait = timeout if deadline is None else min(timeout, deadline)
+        for start in range(0, len(targets), _MAX_SEQ + 1):
+            results.update(await _socket_batch(targets[start:start + _MAX_SEQ + 1], wait))
+        return results
+
+    sem = asyncio.Semaphore(concurrency)
+
+    async def probe(ip: str) -> bool:
+        async with sem:
+            return await async_subprocess_ping(ip, timeout)
+
+    tasks = {ip: asyncio.create_task(probe(ip)) for ip in ips}
+    _, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    for ip, task in tasks.items():
+        if task.done() and not task.cancelled() and task.exception() is None:
+            results[ip] = task.result()
+    return results
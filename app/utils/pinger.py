@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.crud.vm_master import get_all_master_vms
+from app.utils.probe import probe_hosts
+
+logger = logging.getLogger("uvicorn.error")
+
+# ip -> {"vm_ip", "vm_name", "reachable", "method", "checked_at"}; replaced wholesale after every sweep
+_vm_status_cache: Dict[str, Dict[str, Any]] = {}
+_last_sweep: Dict[str, Any] = {}
+_sweep_task: Optional[asyncio.Task] = None
+
+
+def get_vm_status_cache() -> List[Dict[str, Any]]:
+    """Latest reachability of every active VM, as of the last finished sweep."""
+    return list(_vm_status_cache.values())
+
+
+def get_last_sweep() -> Dict[str, Any]:
+    return dict(_last_sweep)
+
+
+def _load_vms() -> List[Tuple[str, str, Optional[str]]]:
+    db = SessionLocal()
+    try:
+        return [(vm.ip, vm.vm_name, vm.probe_method) for vm in get_all_master_vms(db)]
+    finally:
+        db.close()
+
+
+async def sweep_once() -> Dict[str, Any]:
+    """
+    Probe every active VM in one batch (see app/utils/probe.py). Hosts still
+    pending when `ping_sweep_deadline` expires are reported unreachable, so one
+    sweep never takes longer than the deadline whatever the fleet size.
+    """
+    global _vm_status_cache, _last_sweep
+    started = asyncio.get_running_loop().time()
+    vms = await asyncio.to_thread(_load_vms)
+    results = await probe_hosts(
+        ((ip, method) for ip, _, method in vms),
+        deadline=settings.ping_sweep_deadline,
+    )
+
+    checked_at = datetime.now()
+    cache = {}
+    for ip, vm_name, _ in vms:
+        reachable, method = results[ip]
+        cache[ip] = {
+            "vm_ip": ip,
+            "vm_name": vm_name,
+            "reachable": bool(reachable),
+            "method": method,
+            "checked_at": checked_at,
+        }
+    _vm_status_cache = cache
+
+    _last_sweep = {
+        "hosts": len(results),
+        "reachable": sum(1 for reachable, _ in results.values() if reachable),
+        "via_tcp": sum(1 for _, method in results.values() if method and method.startswith("tcp")),
+        "timed_out": sum(1 for reachable, _ in results.values() if reachable is None),
+        "duration_sec": round(asyncio.get_running_loop().time() - started, 3),
+        "finished_at": checked_at,
+    }
+    return _last_sweep
+
+
+async def _sweep_loop():
+    loop = asyncio.get_running_loop()
+    next_run = loop.time()
+    while True:
+        try:
+            await sweep_once()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Ping sweep failed")
+        # fixed cadence: a slow sweep shortens the following sleep, it never shifts the schedule
+        next_run += settings.ping_interval
+        now = loop.time()
+        if next_run < now:
+            next_run = now
+        await asyncio.sleep(next_run - now)
+
+
+def start_ping_sweeper():
+    global _sweep_task
+    if _sweep_task is None or _sweep_task.done():
+        _sweep_task = asyncio.create_task(_sweep_loop())
+
+
+async def stop_ping_sweeper():
+    global _sweep_task
+    if _sweep_task is not None and not _sweep_task.done():
+        _sweep_task.cancel()
+        try:
+            await _sweep_task
+        except asyncio.CancelledError:
+            pass
+    _sweep_task = None
@@ -0,0 +1,126 @@
+import asyncio
+import socket
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.icmp import ping_ip, probe_many
+
+PROBE_METHODS = ("icmp", "tcp", "auto")
+
+
+def tcp_ports() -> List[int]:
+    return [int(port) for port in settings.probe_tcp_ports.split(",") if port.strip()]
+
+
+def resolve_method(method: Optional[str]) -> str:
+    """Per-VM method when set, otherwise the global PROBE_METHOD."""
+    method = method or settings.probe_method
+    return method if method in PROBE_METHODS else "icmp"
+
+
+async def _tcp_connect(ip: str, port: int, timeout: float) -> Optional[str]:
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except ConnectionRefusedError:
+        # an RST still proves the host is up, just not listening on this port
+        return "tcp:refused"
+    except (OSError, asyncio.TimeoutError):
+        return None
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return f"tcp:{port}"
+
+
+async def tcp_probe(ip: str, timeout: Optional[float] = None) -> Optional[str]:
+    """
+    Connect to every PROBE_TCP_PORTS port at once. Returns "tcp:<port>" for the
+    first open port, "tcp:refused" if the host only answered with resets, None
+    if nothing answered within the timeout.
+    """
+    timeout = timeout or settings.probe_tcp_timeout
+    attempts = [asyncio.create_task(_tcp_connect(ip, port, timeout)) for port in tcp_ports()]
+    refused = False
+    try:
+        for attempt in asyncio.as_completed(attempts):
+            method = await attempt
+            if method == "tcp:refused":
+                refused = True
+            elif method:
+                return method
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
+    return "tcp:refused" if refused else None
+
+
+async def probe_hosts(
+    targets: Iterable[Tuple[str, Optional[str]]],
+    deadline: Optional[float] = None,
+) -> Dict[str, Tuple[Optional[bool], Optional[str]]]:
+    """
+    Reachability of (ip, method) pairs in one concurrent sweep: ICMP hosts go out
+    as a single batch while TCP hosts are connected to in parallel; "auto" hosts
+    that ignore ICMP get a TCP attempt afterwards. Returns ip -> (reachable, method
+    that succeeded); reachable is None for hosts undecided at `deadline`.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    methods = {ip: resolve_method(method) for ip, method in targets}
+    results: Dict[str, Tuple[Optional[bool], Optional[str]]] = {ip: (None, None) for ip in methods}
+    sem = asyncio.Semaphore(settings.ping_concurrency)
+
+    async def tcp(ip: str):
+        async with sem:
+            method = await tcp_probe(ip)
+        results[ip] = (method is not None, method)
+
+    async def icmp(ips: List[str]):
+        replies = await probe_many(
+            ips,
+            timeout=settings.ping_timeout,
+            concurrency=settings.ping_concurrency,
+            deadline=deadline,
+        )
+        fallback = []
+        for ip, reachable in replies.items():
+            if reachable:
+                results[ip] = (True, "icmp")
+            elif methods[ip] == "auto":
+                fallback.append(ip)
+            else:
+                results[ip] = (reachable, None)
+        await asyncio.gather(*(tcp(ip) for ip in fallback))
+
+    work = [asyncio.create_task(tcp(ip)) for ip, method in methods.items() if method == "tcp"]
+    icmp_ips = [ip for ip, method in methods.items() if method != "tcp"]
+    if icmp_ips:
+        work.append(asyncio.create_task(icmp(icmp_ips)))
+    if work:
+        remaining = None if deadline is None else max(0.0, deadline - (loop.time() - started))
+        _, pending = await asyncio.wait(work, timeout=remaining)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    return results
+
+
+def check_reachable(ip: str, method: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+    """Blocking single-host counterpart of probe_hosts, for the request/worker threads."""
+    method = resolve_method(method)
+    if method != "tcp" and ping_ip(ip, settings.ping_timeout):
+        return True, "icmp"
+    if method == "icmp":
+        return False, None
+    refused = False
+    for port in tcp_ports():
+        try:
+            socket.create_connection((ip, port), timeout=settings.probe_tcp_timeout).close()
+            return True, f"tcp:{port}"
+        except ConnectionRefusedError:
+            refused = True
+        except OSError:
+            continue
+    return (True, "tcp:refused") if refused else (False, None)
@@ -0,0 +1,138 @@
+"""
+Reference push agent: samples CPU, memory and disk usage from /proc on the VM it
+runs on and streams them to POST /status/ingest as newline-delimited JSON.
+
+Standard library only, so it can be copied onto a host on its own:
+
+    python3 push_agent.py --url http://monitor:8000/status/ingest \\
+        --token $INTERNAL_TOKEN --vm-id 42 --ip 10.0.5.42 --interval 60
+
+`--stdout` prints the NDJSON lines instead, for relays that batch many hosts
+into one stream. Samples that could not be delivered are kept (up to
+--spool-size) and sent with the next push.
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+import urllib.request
+from collections import deque
+from datetime import datetime, timezone
+
+
+def _cpu_times():
+    with open("/proc/stat") as f:
+        fields = [int(v) for v in f.readline().split()[1:]]
+    idle = fields[3] + (fields[4] if len(fields) > 4 else 0)  # idle + iowait
+    return sum(fields), idle
+
+
+def cpu_percent(interval=1.0):
+    total_1, idle_1 = _cpu_times()
+    time.sleep(interval)
+    total_2, idle_2 = _cpu_times()
+    total = total_2 - total_1
+    return round(100.0 * (total - (idle_2 - idle_1)) / total, 2) if total else 0.0
+
+
+def memory_percent():
+    info = {}
+    with open("/proc/meminfo") as f:
+        for line in f:
+            key, value = line.split(":", 1)
+            info[key] = int(value.split()[0])
+    available = info.get("MemAvailable", info.get("MemFree", 0))
+    return round(100.0 * (1 - available / info["MemTotal"]), 2)
+
+
+def disk_usage():
+    """used% per block device, keyed like check_vm keys them (device basename)."""
+    disks = {}
+    with open("/proc/mounts") as f:
+        for line in f:
+            device, mount = line.split()[:2]
+            if not device.startswith("/dev/") or device.split("/")[-1] in disks:
+                continue
+            try:
+                st = os.statvfs(mount)
+            except OSError:
+                continue
+            used = st.f_blocks - st.f_bfree
+            usable = used + st.f_bavail
+            if usable:
+                # same rounding up as df's Use% column
+                disks[device.split("/")[-1]] = f"{-(-100 * used // usable)}%"
+    return disks
+
+
+def sample(vm_id, ip, interval):
+    cpu = cpu_percent(interval)
+    return {
+        "vm_id": vm_id,
+        "ip": ip,
+        "status": "reachable",
+        "os": "linux",
+        "cpu_utilization": cpu,
+        "memory_utilization": memory_percent(),
+        "disk_utilization": json.dumps(disk_usage()),
+        # sent along so samples replayed from the spool keep their own time
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def push(url, token, samples, timeout=20):
+    lines = (json.dumps(s).encode() + b"\n" for s in samples)
+    request = urllib.request.Request(
+        url,
+        data=lines,  # an iterable body is sent with chunked transfer encoding
+        method="POST",
+        headers={"Content-Type": "application/x-ndjson", "internal-token": token},
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.load(response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="the /status/ingest endpoint")
+    parser.add_argument("--token", default=os.environ.get("INTERNAL_TOKEN", ""))
+    parser.add_argument("--vm-id", type=int, required=True)
+    parser.add_argument("--ip", help="default: the address the hostname resolves to")
+    parser.add_argument("--interval", type=float, default=60, help="seconds between samples")
+    parser.add_argument("--cpu-window", type=float, default=1.0, help="seconds CPU usage is averaged over")
+    parser.add_argument("--spool-size", type=int, default=1440)
+    parser.add_argument("--once", action="store_true")
+    parser.add_argument("--stdout", action="store_true")
+    args = parser.parse_args()
+    if not args.stdout and not args.url:
+        parser.error("--url is required unless --stdout is given")
+    if not args.ip:
+        try:
+            args.ip = socket.gethostbyname(socket.gethostname())
+        except OSError as e:
+            parser.error(f"cannot resolve this host's address ({e}), pass --ip")
+
+    spool = deque(maxlen=args.spool_size)
+    while True:
+        started = time.monotonic()
+        spool.append(sample(args.vm_id, args.ip, args.cpu_window))
+        if args.stdout:
+            while spool:
+                print(json.dumps(spool.popleft()), flush=True)
+        else:
+            try:
+                result = push(args.url, args.token, list(spool))
+                spool.clear()
+                if result.get("failed"):
+                    print(f"ingest rejected samples: {result['errors']}", file=sys.stderr)
+            except OSError as e:
+                print(f"push failed, {len(spool)} samples spooled: {e}", file=sys.stderr)
+        if args.once:
+            break
+        time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.database import SessionLocal, engine
+from app.database.lock import LeaderLock
+from app.crud.vm_status_rollup import compact_rollups
+
+logger = logging.getLogger("uvicorn.error")
+
+_rollup_task: Optional[asyncio.Task] = None
+_last_run: Dict[str, Any] = {}
+# every worker runs the loop, only the lock holder compacts
+_leader = LeaderLock(engine, "vm_status_rollup")
+
+
+def run_compaction() -> Dict[str, Any]:
+    global _last_run
+    db = SessionLocal()
+    try:
+        _last_run = compact_rollups(db)
+        return _last_run
+    finally:
+        db.close()
+
+
+def get_last_run() -> Dict[str, Any]:
+    """Result of this worker's last compaction; empty in workers that are not the leader."""
+    return dict(_last_run)
+
+
+async def _rollup_loop():
+    try:
+        while True:
+            try:
+                if await asyncio.to_thread(_leader.held):
+                    await asyncio.to_thread(run_compaction)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("vm_status rollup compaction failed")
+            await asyncio.sleep(settings.rollup_interval)
+    finally:
+        _leader.release()
+
+
+def start_rollup_job():
+    global _rollup_task
+    if settings.rollup_interval > 0 and (_rollup_task is None or _rollup_task.done()):
+        _rollup_task = asyncio.create_task(_rollup_loop())
+
+
+async def stop_rollup_job():
+    global _rollup_task
+    if _rollup_task is not None and not _rollup_task.done():
+        _rollup_task.cancel()
+        try:
+            await _rollup_task
+        except asyncio.CancelledError:
+            pass
+    _rollup_task = None
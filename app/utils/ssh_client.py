@@ -1,91 +1,114 @@
 import paramiko
 import socket
-import subprocess
-from pysnmp.hlapi import *
+from app.utils.probe import check_reachable
+from app.utils.ssh_pool import ssh_pool
+from app.core.config import settings
 # from pysnmp.hlapi import getCmd
 # import re
 # import logging
 
-def get_os_type(ssh_client):
-    stdin, stdout, stderr = ssh_client.exec_command("uname")
-    output = stdout.read().decode().lower()
-    if "linux" in output:
-        return "linux"
-    stdin, stdout, stderr = ssh_client.exec_command("systeminfo")
-    output = stdout.read().decode().lower()
-    if "windows" in output:
-        return "windows"
-    return "unknown"
-
-def get_metrics_linux(ssh_client):
-    cpu_cmd = "top -bn1 | grep 'Cpu(s)' | awk '{print $2 + $4}'"
-    mem_cmd = "free | grep Mem | awk '{print $3/$2 * 100.0}'"
-    disk_cmd = "df -h --output=source,pcent | grep '^/dev/'"
-
-    #why we are using these commands too like this? istead of top, free, df -h?
-    r""" top shows a live dashboard with CPU, memory, etc.
-
-    -b = batch mode (non-interactive)
-
-    -n1 = only 1 snapshot (not continuous)
-
-    grep 'Cpu(s)' = pick the line with CPU info
-
-    awk '{print $2 + $4}' = adds user + system CPU usage, ignoring idle and other overhead. """
-
-    stdin, stdout, stderr = ssh_client.exec_command(cpu_cmd)
-    cpu_util = stdout.read().decode().strip() + '%'
+# One script per OS dialect: everything check_vm needs comes back from a single
+# exec_command as key=value lines, instead of one channel per metric.
+#
+# CPU comes from `top -bn1` (batch mode, one snapshot): the 'Cpu(s)' line's
+# $2 + $4 adds user + system usage, ignoring idle and other overhead.
+LINUX_METRICS_SCRIPT = (
+    "export LC_ALL=C; "
+    "echo \"os=$(uname)\"; "
+    "top -bn1 | grep 'Cpu(s)' | awk '{print \"cpu=\" $2 + $4}'; "
+    "free | grep Mem | awk '{print \"mem=\" $3/$2 * 100.0}'; "
+    "df -h --output=source,pcent | grep '^/dev/' | awk '{print \"disk=\" $1 \" \" $2}'"
+)
+
+# wrapped in cmd /c so it behaves the same whether sshd's shell is cmd or PowerShell
+WINDOWS_METRICS_SCRIPT = (
+    'cmd /c "echo os=windows'
+    ' & wmic cpu get loadpercentage /value'
+    ' & wmic OS get FreePhysicalMemory,TotalVisibleMemorySize /value'
+    ' & wmic logicaldisk get name,freespace,size /value"'
+)
+
+def _exec(ssh_client, command):
+    stdin, stdout, stderr = ssh_client.exec_command(command, timeout=settings.ssh_command_timeout)
+    return stdout.read().decode(errors="ignore")
+
+
+def _key_values(output):
+    for line in output.splitlines():
+        key, sep, value = line.strip().partition("=")
+        if sep:
+            yield key.strip(), value.strip()
+
+
+def parse_linux_metrics(output):
+    """(cpu, mem, disks) from LINUX_METRICS_SCRIPT output, None if the host is not Linux."""
+    values = {}
+    disks = {}
+    for key, value in _key_values(output):
+        if key == "disk":
+            parts = value.split()
+            if len(parts) == 2:
+                disks[parts[0].split('/')[-1]] = parts[1]
+        else:
+            values[key] = value
+    if "linux" not in values.get("os", "").lower():
+        return None
+    return values.get("cpu", "") + '%', values.get("mem", "") + '%', disks
 
-    stdin, stdout, stderr = ssh_client.exec_command(mem_cmd)
-    mem_util = stdout.read().decode().strip() + '%'
 
-    stdin, stdout, stderr = ssh_client.exec_command(disk_cmd)
-    disks_raw = stdout.read().decode().strip().split('\n')
+def parse_windows_metrics(output):
+    """(cpu, mem, disks) from WINDOWS_METRICS_SCRIPT output, None if the host is not Windows."""
+    values = {}
     disks = {}
-    for line in disks_raw:
-        parts = line.split()
-        if len(parts) == 2:
-            disks[parts[0].split('/')[-1]] = parts[1]
+    disk = {}
+    for key, value in _key_values(output):
+        if key in ("FreeSpace", "Name", "Size"):
+            # wmic /value prints one FreeSpace/Name/Size block per logical disk
+            disk[key] = value
+            if len(disk) == 3:
+                try:
+                    disks[disk["Name"]] = str(round((1 - int(disk["FreeSpace"]) / int(disk["Size"])) * 100, 2)) + '%'
+                except ZeroDivisionError:
+                    disks[disk["Name"]] = "N/A"
+                except ValueError:
+                    pass  # drives without media report empty sizes
+                disk = {}
+        else:
+            values[key] = value
+    if values.get("os") != "windows" or "LoadPercentage" not in values:
+        return None
 
+    cpu = values["LoadPercentage"]
+    cpu_util = cpu + '%' if cpu.isdigit() else "N/A"
+    try:
+        free = int(values["FreePhysicalMemory"])
+        total = int(values["TotalVisibleMemorySize"])
+        mem_util = str(round((1 - free / total) * 100, 2)) + '%'
+    except (KeyError, ValueError, ZeroDivisionError):
+        mem_util = "N/A"
     return cpu_util, mem_util, disks
 
-def get_metrics_windows(ssh_client):
-    cpu_cmd = "wmic cpu get loadpercentage"
-    mem_cmd = 'wmic OS get FreePhysicalMemory,TotalVisibleMemorySize /Value'
-    disk_cmd = 'wmic logicaldisk get name,freespace,size'
 
-    # CPU
-    stdin, stdout, stderr = ssh_client.exec_command(cpu_cmd)
-    cpu_lines = [line.strip() for line in stdout.read().decode().splitlines() if line.strip()]
-    if len(cpu_lines) < 2 or not cpu_lines[1].isdigit():
-        cpu_util = "N/A"
-    else:
-        cpu_util = cpu_lines[1] + '%'
+METRIC_DIALECTS = {
+    "linux": (LINUX_METRICS_SCRIPT, parse_linux_metrics),
+    "windows": (WINDOWS_METRICS_SCRIPT, parse_windows_metrics),
+}
 
-    # Memory
-    stdin, stdout, stderr = ssh_client.exec_command(mem_cmd)
-    mem_data = [line for line in stdout.read().decode().splitlines() if '=' in line]
-    try:
-        free = int([x for x in mem_data if x.startswith('FreePhysicalMemory=')][0].split('=')[1])
-        total = int([x for x in mem_data if x.startswith('TotalVisibleMemorySize=')][0].split('=')[1])
-        mem_util = str(round((1 - free / total) * 100, 2)) + '%'
-    except (IndexError, ValueError, ZeroDivisionError):
-        mem_util = "N/A"
 
-    # Disk
-    stdin, stdout, stderr = ssh_client.exec_command(disk_cmd)
-    disks = {}
-    lines = [line.strip() for line in stdout.read().decode().splitlines() if line.strip()]
-    for line in lines[1:]:  # Skip the header
-        parts = line.split()
-        if len(parts) == 3:
-            free, name, size = parts
-            try:
-                percent = str(round((1 - int(free)/int(size)) * 100, 2)) + '%'
-            except ZeroDivisionError:
-                percent = "N/A"
-            disks[name] = percent
-    return cpu_util, mem_util, disks
+def collect_metrics(ssh_client, os_hint=None):
+    """
+    Gather metrics with the dialect of `os_hint` (the OS remembered for this VM);
+    the other dialect is only tried when that one fails, i.e. the OS is re-detected.
+    Without a hint Linux goes first, so Linux hosts take one round trip and Windows
+    hosts two. Returns (os_type, cpu, mem, disks), or None when neither dialect answered.
+    """
+    order = sorted(METRIC_DIALECTS, key=lambda os_type: os_type != os_hint)
+    for os_type in order:
+        script, parse = METRIC_DIALECTS[os_type]
+        metrics = parse(_exec(ssh_client, script))
+        if metrics is not None:
+            return (os_type,) + metrics
+    return None
 
 
 # def snmp_reachable(ip: str, community: str = "public", port: int = 161, timeout: int = 2) -> bool:
@@ -109,14 +132,15 @@ def get_metrics_windows(ssh_client):
 #         return True   # Responded with error = reachable
 #     return True        # Responded successfully
 
-def check_vm(ip, username, password):
+def check_vm(ip, username, password, probe_method=None, os_hint=None):
     if not username or not password:
-        is_reachable = ping_ip(ip)
+        is_reachable, method = check_reachable(ip, probe_method)
         # if not is_reachable:
         #     is_reachable = snmp_reachable(ip)
         return {
             "ip": ip,
             "status": "reachable" if is_reachable else "not reachable",
+            "probe_method": method,
             "os": None,
             "cpu_utilization": None,
             "memory_utilization": None,
@@ -124,26 +148,18 @@ def check_vm(ip, username, password):
         }
 
     else:
-        client = paramiko.SSHClient()
-        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        try:
-            client.connect(hostname=ip, username=username, password=password, timeout=5)
-
-            os_type = get_os_type(client)
-
-            if os_type == "linux":
-                cpu, mem, disk = get_metrics_linux(client)
-            elif os_type == "windows":
-                cpu, mem, disk = get_metrics_windows(client)
-            else:
+        def collect(client):
+            metrics = collect_metrics(client, os_hint)
+            if metrics is None:
                 return {
                     "ip": ip,
                     "status": "not reachable",
-                    "os": os_type,
+                    "os": "unknown",
                     "cpu_utilization": None,
                     "memory_utilization": None,
                     "disk_utilization": None,
                 }
+            os_type, cpu, mem, disk = metrics
 
             return {
                 "ip": ip,
@@ -153,6 +169,9 @@ def check_vm(ip, username, password):
                 "memory_utilization": mem,
                 "disk_utilization": disk,
             }
+
+        try:
+            return ssh_pool.run(ip, username, password, collect)
         except (paramiko.ssh_exception.NoValidConnectionsError, socket.timeout, paramiko.AuthenticationException):
             return {
                 "ip": ip,
@@ -162,18 +181,13 @@ def check_vm(ip, username, password):
                 "memory_utilization": None,
                 "disk_utilization": None,
             }
-        finally:
-            client.close()
 
 
 
  
 
 def run_command_on_vm(ip, username, password, command):
-    client = paramiko.SSHClient()
-    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    try:
-        client.connect(hostname=ip, username=username, password=password, timeout=5)
+    def execute(client):
         stdin, stdout, stderr = client.exec_command(command)
         output = stdout.read().decode().strip()
         error = stderr.read().decode().strip()
@@ -183,34 +197,12 @@ def run_command_on_vm(ip, username, password, command):
             "stdout": output,
             "stderr": error or None
         }
+
+    try:
+        return ssh_pool.run(ip, username, password, execute)
     except (paramiko.ssh_exception.NoValidConnectionsError, socket.timeout, paramiko.AuthenticationException) as e:
         return {
             "ip": ip,
             "status": "failed",
             "error": str(e)
         }
-    finally:
-        client.close()
-
-
-import sys
-
-def ping_ip(ip: str) -> bool:
-    try:
-        if sys.platform.startswith("win"):
-            # Windows ping: -n count, -w timeout (ms)
-            result = subprocess.run(
-                ["ping", "-n", "1", "-w", "1000", ip],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-        else:
-            # Linux/Mac ping: -c count, -W timeout (s)
-            result = subprocess.run(
-                ["ping", "-c", "1", "-W", "1", ip],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-        return result.returncode == 0
-    except Exception:
-        return False
@@ -0,0 +1,208 @@
+import hashlib
+import logging
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import paramiko
+
+from app.core.config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+# errors that mean the transport itself is gone, as opposed to a failed command
+BROKEN_TRANSPORT_ERRORS = (paramiko.SSHException, EOFError, ConnectionResetError, BrokenPipeError, socket.error)
+
+
+class _Entry:
+    def __init__(self, max_channels: int):
+        self.client: Optional[paramiko.SSHClient] = None
+        self.lock = threading.Lock()  # serialises (re)connects to one host
+        self.slots = threading.BoundedSemaphore(max_channels)
+        self.in_use = 0
+        self.last_used = time.monotonic()
+
+    def alive(self) -> bool:
+        transport = self.client.get_transport() if self.client else None
+        return bool(transport and transport.is_active())
+
+    def close(self):
+        if self.client:
+            self.client.close()
+        self.client = None
+
+
+class SSHPool:
+    """
+    Live SSH transports keyed by (ip, username, password digest), so repeated
+    checks against a host skip the key exchange and password auth, while a wrong
+    or rotated password never rides on a session another caller authenticated. At most `max_channels` sessions run
+    on one transport at a time; transports idle longer than `idle_timeout` are
+    closed by a janitor thread, and dead ones are reconnected on next use.
+    """
+
+    def __init__(
+        self,
+        port: int = 22,
+        connect_timeout: float = 5,
+        max_channels: int = 4,
+        idle_timeout: float = 3900,
+        keepalive: int = 30,
+    ):
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.max_channels = max_channels
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+        self._entries: Dict[Tuple[str, str, bytes], _Entry] = {}
+        self._lock = threading.Lock()
+        self._janitor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.connects = 0
+        self.reuses = 0
+
+    @staticmethod
+    def _key(ip: str, username: str, password: Optional[str]) -> Tuple[str, str, bytes]:
+        # a digest, so the pool holds no second copy of every password
+        return ip, username, hashlib.sha256(password.encode()).digest() if password is not None else b""
+
+    def _entry(self, key: Tuple[str, str, bytes]) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(self.max_channels)
+            if self._janitor is None or not self._janitor.is_alive():
+                self._stop.clear()
+                self._janitor = threading.Thread(target=self._janitor_loop, name="ssh-pool-janitor", daemon=True)
+                self._janitor.start()
+            return entry
+
+    def _connect(self, ip: str, username: str, password: str) -> paramiko.SSHClient:
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            client.connect(
+                hostname=ip,
+                port=self.port,
+                username=username,
+                password=password,
+                timeout=self.connect_timeout,
+                banner_timeout=self.connect_timeout,
+                auth_timeout=self.connect_timeout,
+            )
+        except Exception:
+            client.close()
+            raise
+        client.get_transport().set_keepalive(self.keepalive)
+        self.connects += 1
+        return client
+
+    @contextmanager
+    def session(self, ip: str, username: str, password: str):
+        """Yield a connected SSHClient for (ip, username, password), holding one channel slot."""
+        entry = self._entry(self._key(ip, username, password))
+        entry.slots.acquire()
+        try:
+            with entry.lock:
+                if entry.alive():
+                    self.reuses += 1
+                else:
+                    entry.close()
+                    entry.client = self._connect(ip, username, password)
+                entry.in_use += 1
+                client = entry.client
+            try:
+                yield client
+            except BROKEN_TRANSPORT_ERRORS:
+                with entry.lock:
+                    if entry.client is client and not entry.alive():
+                        entry.close()
+                raise
+            finally:
+                with entry.lock:
+                    entry.in_use -= 1
+                    entry.last_used = time.monotonic()
+        finally:
+            entry.slots.release()
+
+    def run(self, ip: str, username: str, password: str, fn: Callable[[paramiko.SSHClient], Any]) -> Any:
+        """
+        `fn(client)` on a pooled connection. If a reused transport turns out to be
+        dead, it is replaced and `fn` retried once on the fresh connection. Errors
+        on a transport that is still active (a command timing out, say) are not
+        retried: the connection is fine and other channels may be using it.
+        """
+        reused = self.is_connected(ip, username, password)
+        try:
+            with self.session(ip, username, password) as client:
+                return fn(client)
+        except paramiko.AuthenticationException:
+            raise
+        except BROKEN_TRANSPORT_ERRORS:
+            # session() has already closed the transport if it died
+            if not reused or self.is_connected(ip, username, password):
+                raise
+        with self.session(ip, username, password) as client:
+            return fn(client)
+
+    def is_connected(self, ip: str, username: str, password: str) -> bool:
+        entry = self._entries.get(self._key(ip, username, password))
+        return bool(entry and entry.alive())
+
+    def discard(self, ip: str, username: str, password: str):
+        entry = self._entries.get(self._key(ip, username, password))
+        if entry:
+            with entry.lock:
+                entry.close()
+
+    def evict_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            items = list(self._entries.items())
+        for key, entry in items:
+            with entry.lock:
+                if entry.in_use or now - entry.last_used < self.idle_timeout:
+                    continue
+                entry.close()
+            with self._lock:
+                if self._entries.get(key) is entry and not entry.in_use:
+                    del self._entries[key]
+
+    def _janitor_loop(self):
+        interval = max(1.0, min(60.0, self.idle_timeout / 2))
+        while not self._stop.wait(interval):
+            try:
+                self.evict_idle()
+            except Exception:
+                logger.exception("SSH pool eviction failed")
+
+    def close_all(self):
+        self._stop.set()
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            with entry.lock:
+                entry.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            "hosts": len(entries),
+            "connected": sum(1 for entry in entries if entry.alive()),
+            "channels_in_use": sum(entry.in_use for entry in entries),
+            "connects": self.connects,
+            "reuses": self.reuses,
+        }
+
+
+ssh_pool = SSHPool(
+    port=settings.ssh_port,
+    connect_timeout=settings.ssh_connect_timeout,
+    max_channels=settings.ssh_max_channels_per_host,
+    idle_timeout=settings.ssh_idle_timeout,
+    keepalive=settings.ssh_keepalive,
+)
@@ -0,0 +1,32 @@
+"""
+Throwaway settings for the benchmarks. The app refuses to start without its
+required settings; the values here only have to exist, nothing connects with
+them. Whatever the environment (or .env) already sets wins.
+"""
+import os
+from typing import MutableMapping, Optional
+
+from cryptography.fernet import Fernet
+
+DEFAULTS = {
+    "DB_HOST": "localhost", "DB_PORT": "3306", "DB_USER": "bench", "DB_NAME": "bench",
+    "ALGORITHM": "HS256", "ACCESS_TOKEN_EXPIRE_MINUTES": "60", "SECRET_KEY": "bench-secret",
+    "INTERNAL_TOKEN": "bench", "BASE_URL": "http://localhost",
+    # a scheduled sweep of the seeded fleet would run in the middle of the measurements
+    "COLLECT_INTERVAL": "0",
+}
+
+
+def configure(db_path: Optional[str] = None, environ: Optional[MutableMapping[str, str]] = None, **defaults):
+    """
+    Fill the missing settings in `environ` (os.environ unless given) and return it.
+    With `db_path`, both database URLs point at that SQLite file. Keyword
+    arguments are extra defaults, e.g. ROLLUP_INTERVAL="0".
+    """
+    environ = os.environ if environ is None else environ
+    if db_path is not None:
+        environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+        environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    for name, value in {**DEFAULTS, "FERNET_KEY": Fernet.generate_key().decode(), **defaults}.items():
+        environ.setdefault(name, value)
+    return environ
@@ -0,0 +1,245 @@
+"""
+HTTP load benchmark: starts the app under uvicorn against a throwaway SQLite
+database seeded with a fleet of VMs and days of vm_status history, drives the
+main endpoints at a fixed concurrency and prints a JSON baseline (throughput,
+p50/p95/p99 latency, status codes per endpoint) to diff between releases.
+
+    python -m benchmarks.api_load --vms 200 --days 3 --concurrency 32 --requests 2000 --out baseline.json
+
+Endpoints are driven one after another, not mixed, so each number stands on
+its own. SQLite serializes writers and has no network hop, so absolute numbers
+are not MySQL numbers; compare runs of this script with each other.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks._env import configure
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+
+def seed(vms: int, days: int, interval_minutes: int, today: date):
+    """Insert the user, `vms` VMs and one status per VM every `interval_minutes` for `days` days."""
+    from sqlalchemy import insert
+    from app.core.security import hash_password
+    from app.database import engine
+    from app.database.migrate import backfill_latest_status
+    from app.models import User
+    from app.models.vm_master import VMMaster
+    from app.models.vm_status import VMStatus, VMDiskUsage
+
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(insert(User).values(name="bench", email=EMAIL, password=hash_password(PASSWORD), role=1))
+        conn.execute(insert(VMMaster).values([
+            {
+                "id": vm_id,
+                "vm_name": f"bench-vm-{vm_id:05d}",
+                "ip": f"127.{vm_id >> 16 & 255}.{vm_id >> 8 & 255}.{vm_id & 255}",
+                "project_name": f"project-{vm_id % 5}",
+                "cluster": f"cluster-{vm_id % 3}",
+                "is_active": 1,
+            }
+            for vm_id in range(1, vms + 1)
+        ]))
+
+    start = datetime.combine(today - timedelta(days=days - 1), datetime.min.time())
+    steps = days * 24 * 60 // interval_minutes
+    status_id = 0
+    for step in range(steps):
+        created_at = start + timedelta(minutes=step * interval_minutes)
+        statuses, disks = [], []
+        for vm_id in range(1, vms + 1):
+            status_id += 1
+            used = rng.uniform(5, 99)
+            statuses.append({
+                "id": status_id,
+                "vm_id": vm_id,
+                "ip": "127.0.0.1",
+                "status": "reachable" if rng.random() > 0.05 else "not reachable",
+                "os": "linux",
+                "cpu_utilization": round(rng.uniform(0, 100), 2),
+                "memory_utilization": round(rng.uniform(10, 95), 2),
+                "disk_utilization": json.dumps({"sda1": f"{used:.0f}%"}),
+                "created_at": created_at,
+            })
+            disks.append({"status_id": status_id, "mount": "sda1", "used_pct": round(used)})
+        with engine.begin() as conn:
+            conn.execute(insert(VMStatus), statuses)
+            conn.execute(insert(VMDiskUsage), disks)
+    backfill_latest_status(engine)
+    return status_id
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int):
+    import uvicorn
+    from app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn did not start")
+        time.sleep(0.05)
+    return server, thread
+
+
+def _percentile(samples, q):
+    return round(samples[min(len(samples) - 1, int(len(samples) * q))] * 1000, 3) if samples else None
+
+
+async def drive(client, name, make_request, total, concurrency, report=True):
+    latencies = []
+    statuses = {}
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await make_request(client)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    result = {
+        "requests": total,
+        "errors": errors,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "seconds": round(elapsed, 3),
+        "rps": round(total / elapsed, 1),
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 3) if latencies else None,
+        "p50_ms": _percentile(latencies, 0.50),
+        "p95_ms": _percentile(latencies, 0.95),
+        "p99_ms": _percentile(latencies, 0.99),
+    }
+    if report:
+        print(f"{name:<28} {result['rps']:>9} req/s  p50 {result['p50_ms']}ms  p99 {result['p99_ms']}ms", file=sys.stderr)
+    return result
+
+
+async def run_scenarios(base_url, args, days, status_count):
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        login = await client.post("/auth/login", data={"username": EMAIL, "password": PASSWORD})
+        login.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+        rng = random.Random(7)
+
+        scenarios = {
+            "POST /auth/login": (
+                lambda c: c.post("/auth/login", data={"username": EMAIL, "password": PASSWORD}),
+                args.login_requests,
+            ),
+            "GET /vm/": (lambda c: c.get("/vm/"), args.requests),
+            "GET /status/?date_filter=": (
+                lambda c: c.get("/status/", params={"date_filter": rng.choice(days).isoformat()}),
+                args.requests,
+            ),
+            "GET /status/{status_id}": (lambda c: c.get(f"/status/{rng.randint(1, status_count)}"), args.requests),
+            "GET /monitor/ping": (lambda c: c.get("/monitor/ping"), args.requests),
+        }
+        results = {}
+        for name, (make_request, total) in scenarios.items():
+            warm_up = min(args.concurrency, 4)
+            await drive(client, name, make_request, warm_up, warm_up, report=False)
+            results[name] = await drive(client, name, make_request, total, args.concurrency)
+        return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vms", type=int, default=100)
+    parser.add_argument("--days", type=int, default=2, help="days of vm_status history")
+    parser.add_argument("--interval-minutes", type=int, default=10, help="minutes between seeded samples of a VM")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per read endpoint")
+    parser.add_argument("--login-requests", type=int, default=100, help="bcrypt makes logins far slower")
+    parser.add_argument("--out", help="write the JSON baseline here instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure(os.path.join(tmp, "bench.db"), ROLLUP_INTERVAL="0")
+        from app.database import engine
+        from app.database.migrate import prepare_database
+
+        prepare_database(engine)
+
+        today = date.today()
+        started = time.perf_counter()
+        status_count = seed(args.vms, args.days, args.interval_minutes, today)
+        seed_seconds = time.perf_counter() - started
+        print(f"seeded {args.vms} VMs, {status_count} statuses in {seed_seconds:.1f}s", file=sys.stderr)
+
+        port = _free_port()
+        server, thread = start_server(port)
+        try:
+            days = [today - timedelta(days=n) for n in range(args.days)]
+            results = asyncio.run(run_scenarios(f"http://127.0.0.1:{port}", args, days, status_count))
+        finally:
+            server.should_exit = True
+            thread.join(timeout=10)
+
+    baseline = {
+        "meta": {
+            "revision": _git_revision(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": "sqlite",
+            "vms": args.vms,
+            "days": args.days,
+            "statuses": status_count,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    output = json.dumps(baseline, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Per-request cost of bearer authentication: decode_token alone and the whole
+get_current_user dependency (token + user lookup), each with its cache cold
+(cleared before every call) and warm.
+
+    python -m benchmarks.auth_overhead [--iterations 20000]
+
+Users live in a temporary sqlite database, so the cold numbers understate
+what a MySQL round trip costs. Settings are read from the environment / .env
+like the app does; required ones that are missing get throwaway values.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks._env import configure
+
+configure()
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import app.core.auth as auth  # noqa: E402
+from app.core.jwt import create_token, decode_token, token_cache  # noqa: E402
+from app.database import Base  # noqa: E402
+from app.models import User  # noqa: E402
+
+
+def measure(fn, iterations, before=None):
+    samples = []
+    for _ in range(iterations):
+        if before:
+            before()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "mean_us": round(statistics.fmean(samples) * 1e6, 2),
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 2),
+        "p99_us": round(samples[int(len(samples) * 0.99)] * 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "auth.db")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        user = User(name="bench", email="bench@example.com", password="x", role=1)
+        db.add(user)
+        db.commit()
+        token = create_token(subject=str(user.id), name=user.name)
+        db.close()
+        engine.dispose()
+
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        auth.AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+        loop = asyncio.new_event_loop()
+
+        def resolve():
+            loop.run_until_complete(auth.get_current_user(decode_token(token)))
+
+        def cold():
+            token_cache.clear()
+            auth.user_cache.clear()
+
+        results = {
+            "decode_token cold": measure(lambda: decode_token(token), args.iterations, token_cache.clear),
+            "decode_token warm": measure(lambda: decode_token(token), args.iterations),
+            "get_current_user cold": measure(resolve, args.iterations, cold),
+            "get_current_user warm": measure(resolve, args.iterations),
+        }
+        loop.run_until_complete(async_engine.dispose())
+        loop.close()
+
+    width = max(map(len, results))
+    print(f"{'':{width}}  {'mean':>10}  {'p50':>10}  {'p99':>10}")
+    for name, stats in results.items():
+        print(f"{name:{width}}  {stats['mean_us']:>8}us  {stats['p50_us']:>8}us  {stats['p99_us']:>8}us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+Local fleet simulator: thousands of fake SSH hosts, one per loopback address,
+that answer the Linux and Windows metric scripts of app/utils/ssh_client.py
+with plausible numbers. Lets check_vm, the ping sweeper and the collector
+(app/utils/vm.py) run against a fleet of any size without real VMs.
+
+    python -m benchmarks.fleet_sim --hosts 1000 --port 2222 --latency-ms 40 \\
+        --fail-rate 0.01 --hang-rate 0.01 --unreachable-rate 0.05 --manifest fleet.json
+
+Host n listens on 127.10.0.0 + n at --port (point the app at it with
+SSH_PORT), logs in as user "sim" with password "sim-<n>", and is Linux or
+Windows per --windows-ratio. Every command is answered after --latency-ms
+(+/- --jitter-ms); with probability --fail-rate the connection is dropped
+instead, with --hang-rate it never answers. Unreachable hosts get an address
+from 198.18.0.0/15 (the RFC 2544 benchmarking range), which nothing listens on
+or replies to ICMP from, so pings and SSH connects to them time out.
+
+The fleet is derived from --hosts/--seed/ratios alone, so build_fleet() in
+another process yields the same hosts, e.g. to seed vm_master. Hosts are
+spread over --workers processes to keep the simulator from being the
+bottleneck; the manifest lists every host as JSON.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import random
+import resource
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+import paramiko
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+USERNAME = "sim"
+
+
+def host_ip(n: int, reachable: bool = True) -> str:
+    if reachable:
+        return f"127.{10 + (n >> 16)}.{(n >> 8) & 255}.{n & 255}"
+    return f"198.{18 + (n >> 16)}.{(n >> 8) & 255}.{n & 255}"
+
+
+def build_fleet(hosts: int, seed: int = 1, windows_ratio: float = 0.2, unreachable_rate: float = 0.0) -> List[Dict]:
+    rng = random.Random(seed)
+    fleet = []
+    for n in range(1, hosts + 1):
+        reachable = rng.random() >= unreachable_rate
+        fleet.append({
+            "index": n,
+            "ip": host_ip(n, reachable),
+            "username": USERNAME,
+            "password": f"sim-{n}",
+            "os": "windows" if rng.random() < windows_ratio else "linux",
+            "reachable": reachable,
+        })
+    return fleet
+
+
+def linux_output(rng: random.Random) -> str:
+    lines = [
+        "os=Linux",
+        f"cpu={rng.uniform(0, 100):.1f}",
+        f"mem={rng.uniform(5, 95):.4f}",
+        f"disk=/dev/sda1 {rng.randint(5, 99)}%",
+        f"disk=/dev/sdb1 {rng.randint(5, 99)}%",
+        f"disk=/dev/mapper/vg0-root {rng.randint(5, 99)}%",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def windows_output(rng: random.Random) -> str:
+    total = 16 * 1024 * 1024
+    lines = [
+        "os=windows",
+        "", "", f"LoadPercentage={rng.randint(0, 100)}", "", "",
+        "", "", f"FreePhysicalMemory={rng.randint(total // 20, total)}", f"TotalVisibleMemorySize={total}", "", "",
+    ]
+    for drive in ("C:", "D:"):
+        size = 500 * 1024 ** 3
+        lines += ["", f"FreeSpace={rng.randint(size // 100, size)}", f"Name={drive}", f"Size={size}", ""]
+    return "\r\n".join(lines) + "\r\n"
+
+
+class Behaviour:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, fail_rate=0.0, hang_rate=0.0, seed=1):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.fail_rate = fail_rate
+        self.hang_rate = hang_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"connections": 0, "commands": 0, "failed": 0, "hung": 0}
+
+    def draw(self):
+        with self.lock:
+            roll = self.rng.random()
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            return roll, delay, random.Random(self.rng.random())
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+
+class _Transport(paramiko.Transport):
+    """
+    Server transport that tells exec handlers when their request was answered.
+    paramiko sends the exec reply only after check_channel_exec_request returns;
+    output and close sent before it make the client fail with "Channel closed.".
+    """
+
+    def __init__(self, sock):
+        super().__init__(sock)
+        self.unacknowledged: List[threading.Event] = []
+
+    def _send_user_message(self, data):
+        super()._send_user_message(data)
+        # the first message the transport thread sends after a request is its reply
+        if threading.current_thread() is self:
+            while self.unacknowledged:
+                self.unacknowledged.pop().set()
+
+
+class FakeHost(paramiko.ServerInterface):
+    def __init__(self, host: Dict, behaviour: Behaviour):
+        self.host = host
+        self.behaviour = behaviour
+        self.transport = None
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_auth_password(self, username, password):
+        if username == self.host["username"] and password == self.host["password"]:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        acknowledged = threading.Event()
+        self.transport.unacknowledged.append(acknowledged)
+        threading.Thread(
+            target=self._run, args=(channel, command.decode(errors="ignore"), acknowledged), daemon=True
+        ).start()
+        return True
+
+    def _run(self, channel, command, acknowledged):
+        # a client that sent the request without want-reply gets no acknowledgement
+        acknowledged.wait(timeout=1)
+        behaviour = self.behaviour
+        behaviour.count("commands")
+        roll, delay, rng = behaviour.draw()
+        if roll < behaviour.hang_rate:
+            behaviour.count("hung")
+            return  # the channel stays open until the client gives up
+        time.sleep(delay)
+        if roll < behaviour.hang_rate + behaviour.fail_rate:
+            behaviour.count("failed")
+            self.transport.close()
+            return
+
+        windows = self.host["os"] == "windows"
+        if command.startswith("cmd /c"):
+            output, code = (windows_output(rng), 0) if windows else ("sh: 1: cmd: not found\n", 127)
+        elif "uname" in command:
+            output, code = ("'export' is not recognized as an internal or external command\r\n", 1) if windows \
+                else (linux_output(rng), 0)
+        else:
+            output, code = "", 0
+        try:
+            channel.sendall(output.encode())
+            channel.send_exit_status(code)
+            channel.close()
+        except (EOFError, OSError, paramiko.SSHException):
+            pass
+
+
+def _host_key() -> paramiko.PKey:
+    pem = Ed25519PrivateKey.generate().private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.OpenSSH, serialization.NoEncryption()
+    )
+    return paramiko.Ed25519Key(file_obj=io.StringIO(pem.decode()))
+
+
+def _raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def serve(hosts: List[Dict], port: int, behaviour: Behaviour, ready=None):
+    """Listen for every reachable host in `hosts` and serve SSH until interrupted."""
+    _raise_fd_limit()
+    key = _host_key()
+    selector = selectors.DefaultSelector()
+    for host in hosts:
+        if not host["reachable"]:
+            continue
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind((host["ip"], port))
+        listener.listen(128)
+        listener.setblocking(False)
+        selector.register(listener, selectors.EVENT_READ, host)
+    if ready:
+        ready()
+
+    while True:
+        for selected, _ in selector.select():
+            try:
+                sock, _ = selected.fileobj.accept()
+            except BlockingIOError:
+                continue
+            sock.setblocking(True)
+            behaviour.count("connections")
+            server = FakeHost(selected.data, behaviour)
+            transport = _Transport(sock)
+            transport.add_server_key(key)
+            server.transport = transport
+            try:
+                # with an event, negotiation runs on the transport's own thread
+                transport.start_server(event=threading.Event(), server=server)
+            except (EOFError, OSError, paramiko.SSHException):
+                transport.close()
+
+
+def _worker_command(args, index: int) -> List[str]:
+    return [
+        sys.executable, "-m", "benchmarks.fleet_sim",
+        "--hosts", str(args.hosts), "--seed", str(args.seed), "--port", str(args.port),
+        "--windows-ratio", str(args.windows_ratio), "--unreachable-rate", str(args.unreachable_rate),
+        "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+        "--fail-rate", str(args.fail_rate), "--hang-rate", str(args.hang_rate),
+        "--workers", str(args.workers), "--worker-index", str(index),
+    ]
+
+
+@contextmanager
+def running_fleet(args, stats: Dict = None, timeout: float = 120):
+    """
+    Start the simulator described by `args` (the options of this module) in
+    --workers child processes; yields the fleet once every host is listening.
+    On exit the workers' connection/command counters are added up in `stats`.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    workers = [
+        subprocess.Popen(_worker_command(args, index), cwd=root, stdout=subprocess.PIPE, text=True)
+        for index in range(args.workers)
+    ]
+    try:
+        deadline = time.monotonic() + timeout
+        for worker in workers:
+            line = worker.stdout.readline()
+            if line.strip() != "ready" or time.monotonic() > deadline:
+                raise RuntimeError(f"fleet simulator worker did not start (exit code {worker.poll()})")
+        yield build_fleet(args.hosts, args.seed, args.windows_ratio, args.unreachable_rate)
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            try:
+                output, _ = worker.communicate(timeout=10)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+                continue
+            if stats is not None and output.strip():
+                for key, value in json.loads(output.strip().splitlines()[-1]).items():
+                    stats[key] = stats.get(key, 0) + value
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--hosts", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=2222, help="SSH port of every host (the app's SSH_PORT)")
+    parser.add_argument("--windows-ratio", type=float, default=0.2)
+    parser.add_argument("--unreachable-rate", type=float, default=0.0, help="share of hosts that do not exist")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="delay before answering a command")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of commands that drop the connection")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="share of commands that never answer")
+    parser.add_argument("--workers", type=int, default=max(1, min(8, (os.cpu_count() or 1) // 2)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument("--manifest", help="write the fleet as JSON here")
+    parser.add_argument("--worker-index", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker_index is not None:
+        fleet = build_fleet(args.hosts, args.seed, args.windows_ratio, args.unreachable_rate)
+        behaviour = Behaviour(args.latency_ms, args.jitter_ms, args.fail_rate, args.hang_rate,
+                              seed=args.seed * 1000 + args.worker_index)
+
+        def stop(*_):
+            print(json.dumps(behaviour.stats), flush=True)
+            os._exit(0)
+
+        signal.signal(signal.SIGTERM, stop)
+        # dropped and hung connections are the point here, not worth a traceback each
+        logging.getLogger("paramiko").setLevel(logging.CRITICAL)
+        serve(fleet[args.worker_index::args.workers], args.port, behaviour, ready=lambda: print("ready", flush=True))
+        return
+
+    with running_fleet(args) as fleet:
+        if args.manifest:
+            with open(args.manifest, "w") as f:
+                json.dump(fleet, f, indent=1)
+        reachable = sum(host["reachable"] for host in fleet)
+        print(f"{reachable} hosts listening on port {args.port}, {len(fleet) - reachable} unreachable; "
+              f"Ctrl-C to stop", file=sys.stderr)
+        try:
+            signal.pause()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Monitoring engine against a simulated fleet (benchmarks/fleet_sim.py) of
+growing size: for every --sizes entry it times one ping sweep (sweep_once,
+what the /monitor/ping loop runs) and two metric collections (run_collection,
+what the scheduled job and POST /monitor/collect run): the first with an empty
+SSH pool, the second reusing its transports. Wall time, CPU seconds of this
+process per host and outcome counts are printed as JSON.
+
+    python -m benchmarks.fleet_sweep --sizes 10,100,1000,10000 --latency-ms 20 --out sweep.json
+
+The simulator runs in separate processes, so the CPU figures are the
+engine's own. All simulator options (latency, failure, hang and unreachable
+rates, --workers) are accepted. The app's settings come from the environment
+as usual; the database is a temporary SQLite file, SSH_PORT is set to --port
+and the SSH timeouts default to a few seconds so hung hosts do not dominate.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+
+from benchmarks._env import configure
+from benchmarks.fleet_sim import add_arguments, running_fleet
+
+
+def load_fleet(fleet):
+    """Replace vm_master (and its status history) with the simulated hosts."""
+    from sqlalchemy import delete, insert
+    from app.database import engine
+    from app.helper.common import encrypt_password
+    from app.models.vm_master import VMMaster
+    from app.models.vm_status import VMStatus, VMStatusLatest, VMDiskUsage
+
+    with engine.begin() as conn:
+        for model in (VMDiskUsage, VMStatusLatest, VMStatus, VMMaster):
+            conn.execute(delete(model))
+        conn.execute(insert(VMMaster), [
+            {
+                "id": host["index"],
+                "vm_name": f"sim-{host['index']:05d}",
+                "ip": host["ip"],
+                "username": host["username"],
+                "password": encrypt_password(host["password"]),
+                "project_name": "fleet-sim",
+                "is_active": 1,
+            }
+            for host in fleet
+        ])
+
+
+def timed(fn):
+    wall, cpu = time.perf_counter(), time.process_time()
+    result = fn()
+    return result, time.perf_counter() - wall, time.process_time() - cpu
+
+
+def _phase(hosts, wall, cpu, **counts):
+    return {
+        "wall_sec": round(wall, 3),
+        "cpu_sec": round(cpu, 3),
+        "cpu_ms_per_host": round(1000 * cpu / hosts, 3),
+        "hosts_per_sec": round(hosts / wall, 1) if wall else None,
+        **counts,
+    }
+
+
+def bench_size(args, size):
+    from app.utils.collector import run_collection
+    from app.utils.pinger import sweep_once
+    from app.utils.ssh_pool import ssh_pool
+
+    sim_args = argparse.Namespace(**{**vars(args), "hosts": size})
+    sim_stats = {}
+    with running_fleet(sim_args, stats=sim_stats) as fleet:
+        load_fleet(fleet)
+        result = {"hosts": size, "reachable_hosts": sum(host["reachable"] for host in fleet)}
+
+        sweep, wall, cpu = timed(lambda: asyncio.run(sweep_once()))
+        result["ping_sweep"] = _phase(size, wall, cpu, reachable=sweep["reachable"], timed_out=sweep["timed_out"])
+
+        ssh_pool.close_all()
+        for name in ("collect_cold", "collect_warm"):
+            report, wall, cpu = timed(run_collection)
+            statuses = Counter(host["status"] for host in report["per_host"])
+            result[name] = _phase(
+                size, wall, cpu,
+                collect_sec=report["collect_sec"],
+                store_sec=report["store_sec"],
+                slowest_host_sec=report["slowest"][0]["seconds"] if report["slowest"] else None,
+                statuses=dict(statuses),
+                ssh_pool=ssh_pool.stats(),
+            )
+        ssh_pool.close_all()
+    result["simulator"] = sim_stats
+
+    print(
+        f"{size:>6} hosts: ping {result['ping_sweep']['wall_sec']}s, "
+        f"collect cold {result['collect_cold']['wall_sec']}s "
+        f"({result['collect_cold']['cpu_ms_per_host']} ms CPU/host), "
+        f"warm {result['collect_warm']['wall_sec']}s ({result['collect_warm']['cpu_ms_per_host']} ms CPU/host)",
+        file=sys.stderr,
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="comma separated fleet sizes")
+    parser.add_argument("--out", help="write the JSON results here instead of stdout")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SSH_PORT"] = str(args.port)
+        configure(os.path.join(tmp, "fleet.db"), SSH_CONNECT_TIMEOUT="3", SSH_COMMAND_TIMEOUT="5")
+        from app.core.config import settings
+        from app.database import Base, engine
+        from app.models import vm_master, vm_status, vm_status_rollup  # noqa: F401  register their tables
+
+        Base.metadata.create_all(bind=engine)
+        results = [bench_size(args, size) for size in sizes]
+
+    output = json.dumps({
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "simulator": {
+                key: getattr(args, key)
+                for key in ("latency_ms", "jitter_ms", "fail_rate", "hang_rate", "unreachable_rate",
+                            "windows_ratio", "workers", "seed")
+            },
+            "collector_concurrency": settings.collector_concurrency,
+            "ping_concurrency": settings.ping_concurrency,
+            "probe_method": settings.probe_method,
+        },
+        "results": results,
+    }, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
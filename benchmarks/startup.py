@@ -0,0 +1,129 @@
+"""
+Cold start of the app: how long `import app.main` takes in a fresh
+interpreter, how long the lifespan takes to start (schema creation and
+migrations, background jobs) against an empty and an already migrated
+database, and how long it takes to shut down. Every run is a new process, so
+the numbers are what a uvicorn worker, a test session or a CLI pays.
+
+    python -m benchmarks.startup [--runs 5] [--top 15] [--out startup.json]
+
+--top lists the modules with the largest self import time (python -X
+importtime). The database is a temporary SQLite file; with MySQL the
+migrations add a network round trip per statement.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks._env import configure
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _child():
+    """Runs in the measured interpreter; prints its timings as one JSON line."""
+    started = time.perf_counter()
+    from app.main import app
+    imported = time.perf_counter()
+
+    async def cycle():
+        context = app.router.lifespan_context(app)
+        began = time.perf_counter()
+        await context.__aenter__()
+        ready = time.perf_counter()
+        await context.__aexit__(None, None, None)
+        return ready - began, time.perf_counter() - ready
+
+    startup, shutdown = asyncio.run(cycle())
+    print(json.dumps({"import": imported - started, "startup": startup, "shutdown": shutdown}))
+
+
+def _run_child(env: dict) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _summary(samples):
+    return {
+        "min_ms": round(min(samples) * 1000, 1),
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def import_profile(env: dict, top: int):
+    """The `top` modules with the largest self import time, from python -X importtime."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        modules.append({"module": name.strip(), "self_ms": int(own) / 1000, "cumulative_ms": int(cumulative) / 1000})
+    modules.sort(key=lambda module: module["self_ms"], reverse=True)
+    return modules[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list, 0 to skip")
+    parser.add_argument("--out", help="write the JSON results here instead of stdout")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child()
+        return
+
+    runs = {"empty_db": [], "migrated_db": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        for run in range(args.runs):
+            env = configure(os.path.join(tmp, f"startup-{run}.db"), dict(os.environ))
+            runs["empty_db"].append(_run_child(env))
+            runs["migrated_db"].append(_run_child(env))
+        profile = import_profile(env, args.top) if args.top else []
+
+    results = {
+        "import": _summary([sample["import"] for samples in runs.values() for sample in samples]),
+        "startup_empty_db": _summary([sample["startup"] for sample in runs["empty_db"]]),
+        "startup_migrated_db": _summary([sample["startup"] for sample in runs["migrated_db"]]),
+        "shutdown": _summary([sample["shutdown"] for samples in runs.values() for sample in samples]),
+    }
+    for name, summary in results.items():
+        print(f"{name:<20} median {summary['median_ms']:>8} ms  (min {summary['min_ms']}, max {summary['max_ms']})",
+              file=sys.stderr)
+
+    output = json.dumps({
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "database": "sqlite",
+        },
+        "results": results,
+        "slowest_imports": profile,
+    }, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()